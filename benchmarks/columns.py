@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""Compares a list of documents against a `DocumentBatch` holding the same
+documents column by column, for memory held and for validating every
+document.
+
+    Reading, 100000 records:
+        documents:      72.8 MB
+        DocumentBatch:   3.0 MB (24.5x smaller)
+        validate loop:          0.460s (4.60us per record)
+        DocumentBatch.validate: 0.052s (0.52us per record)
+"""
+
+import sys
+import timeit
+
+from dictshield.document import EmbeddedDocument
+from dictshield.fields import IntField, FloatField, BooleanField
+
+
+###
+### Model
+###
+
+class Reading(EmbeddedDocument):
+    sensor = IntField(min_value=0, max_value=1000000, required=True)
+    timestamp = IntField(min_value=0, required=True)
+    value = FloatField(min_value=-100.0, max_value=100.0)
+    calibrated = BooleanField()
+
+
+def make_documents(number):
+    return [Reading(sensor=i % 1000, timestamp=1300000000 + i,
+                    value=float(i % 200 - 100), calibrated=bool(i % 2))
+            for i in xrange(number)]
+
+
+def documents_size(docs):
+    size = sys.getsizeof(docs)
+    for doc in docs:
+        size += sys.getsizeof(doc) + sys.getsizeof(doc.__dict__)
+        size += sys.getsizeof(doc._data)
+        size += sum(sys.getsizeof(value) for value in doc._data.values())
+    return size
+
+
+def batch_size(batch):
+    size = 0
+    for name in batch._fields:
+        size += sys.getsizeof(batch.column(name))
+        present = batch.present(name)
+        if present is not None:
+            size += sys.getsizeof(present)
+    return size
+
+
+if __name__ == '__main__':
+    number = 100000
+    docs = make_documents(number)
+    batch = Reading.to_columns(docs)
+
+    def each():
+        for doc in docs:
+            doc.validate()
+
+    def columns():
+        batch.validate()
+
+    print 'Reading, %d records:' % number
+    docs_bytes, batch_bytes = documents_size(docs), batch_size(batch)
+    print '    documents:     %5.1f MB' % (docs_bytes / 1e6)
+    print '    DocumentBatch: %5.1f MB (%.1fx smaller)' % (
+        batch_bytes / 1e6, float(docs_bytes) / batch_bytes)
+    for label, function in [('validate loop:         ', each),
+                            ('DocumentBatch.validate:', columns)]:
+        elapsed = timeit.timeit(function, number=1)
+        print '    %s %.3fs (%.2fus per record)' % (label, elapsed,
+                                                   elapsed * 1e6 / number)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+
+"""Compares what is written when one line of an invoice with 50 lines
+changes and a line is appended: the whole document with `to_json`, or only
+the changes with `to_json_delta`.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/deltas.py
+    Invoice with 50 lines, one changed and one appended:
+        to_json():         4403 bytes, 240.4us
+        to_json_delta():    120 bytes, 32.1us
+"""
+
+import timeit
+
+from dictshield.document import Document, EmbeddedDocument
+from dictshield.fields import (EmbeddedDocumentField, IntField, ListField,
+                               StringField)
+
+
+class Line(EmbeddedDocument):
+    sku = IntField()
+    title = StringField()
+    quantity = IntField()
+
+
+class Invoice(Document):
+    customer = StringField()
+    total = IntField()
+    lines = ListField(EmbeddedDocumentField(Line))
+
+
+invoice = Invoice(customer='customer', total=2500,
+                  lines=[{'sku': i, 'title': 'item %d' % i, 'quantity': 1}
+                         for i in xrange(50)])
+invoice.mark_clean()
+invoice.lines[10].quantity = 2
+invoice.lines.append(Line(sku=50, title='item 50', quantity=1))
+
+
+if __name__ == '__main__':
+    number = 2000
+    print 'Invoice with 50 lines, one changed and one appended:'
+    for label, function in [('to_json():', invoice.to_json),
+                            ('to_json_delta():', invoice.to_json_delta)]:
+        label = label.ljust(17)
+        elapsed = timeit.timeit(function, number=number)
+        print '    %s %5d bytes, %.1fus' % (label, len(function()),
+                                            elapsed * 1e6 / number)
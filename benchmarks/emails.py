@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+
+"""Compares validating email addresses with `dictshield.email_address`,
+which `EmailField` uses, against `EmailField.EMAIL_REGEX`, on a typical
+address and on long hostile inputs.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/emails.py
+    us per validation:
+        typical:                30 chars, regex    1.31, new   1.59 (0.8x)
+        no @:                10000 chars, regex  825.04, new   6.00 (137.6x)
+        dot-atom, no domain:  6001 chars, regex  254.47, new   1.14 (223.3x)
+        quoted, unclosed:     6001 chars, regex  268.21, new   3.72 (72.1x)
+        many labels:          4003 chars, regex  259.86, new   3.08 (84.4x)
+        long top level:       9009 chars, regex  650.08, new   6.03 (107.8x)
+"""
+
+import timeit
+
+from dictshield.email_address import is_email
+from dictshield.fields import EmailField
+
+
+addresses = [
+    ('typical', 'jane.doe+news@mail.example.com'),
+    ('no @', 'a' * 10000),
+    ('dot-atom, no domain', 'a.' * 3000 + '@'),
+    ('quoted, unclosed', '"' + '\\a' * 3000),
+    ('many labels', 'a@' + 'a.' * 2000 + '!'),
+    ('long top level', 'a@' + 'aa.' * 3000 + 'aaaaaaa'),
+]
+
+
+if __name__ == '__main__':
+    match = EmailField.EMAIL_REGEX.match
+    print 'us per validation:'
+    for label, address in addresses:
+        assert bool(match(address)) == is_email(address)
+        number = 200000 if len(address) < 100 else 200
+        regex_time = min(timeit.repeat(lambda: match(address),
+                                       number=number, repeat=3)) / number
+        new_time = min(timeit.repeat(lambda: is_email(address),
+                                     number=number, repeat=3)) / number
+        print '    %-20s %5d chars, regex %7.2f, new %6.2f (%.1fx)' % (
+            label + ':', len(address), regex_time * 1e6, new_time * 1e6,
+            regex_time / new_time)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+
+"""Compares building documents from dictionaries, as they would come out of a
+database, when only two top-level fields are read: with the constructor,
+which converts every field including a list of 50 embedded documents, and
+with `wrap`, which only sets the fields that are read.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/hydration.py
+    Invoice with 50 lines, 100 documents, 100 rounds:
+        Invoice(**row), 2 reads:        1.404s (140.4us per document)
+        Invoice.wrap(row), 2 reads:     0.052s (5.2us per document)
+        Invoice(**row).to_python():     1.610s (161.0us per document)
+        Invoice.wrap(row).to_python():  1.210s (121.0us per document)
+"""
+
+import timeit
+import uuid
+
+from dictshield.document import Document, EmbeddedDocument
+from dictshield.fields import (EmbeddedDocumentField, IntField, ListField,
+                               StringField)
+
+
+class Line(EmbeddedDocument):
+    sku = IntField()
+    title = StringField()
+    quantity = IntField()
+
+
+class Invoice(Document):
+    customer = StringField()
+    total = IntField()
+    lines = ListField(EmbeddedDocumentField(Line))
+
+
+rows = [{'_id': str(uuid.uuid4()), 'customer': 'customer %d' % i,
+         'total': i * 50,
+         'lines': [{'sku': j, 'title': 'item %d' % j, 'quantity': 1}
+                   for j in xrange(50)]}
+        for i in xrange(100)]
+
+
+if __name__ == '__main__':
+    number = 100
+    print 'Invoice with 50 lines, %d documents, %d rounds:' % (len(rows),
+                                                               number)
+
+    def construct():
+        for row in rows:
+            invoice = Invoice(**row)
+            invoice.customer, invoice.total
+
+    def wrap():
+        for row in rows:
+            invoice = Invoice.wrap(row)
+            invoice.customer, invoice.total
+
+    def wrap_serialize():
+        for row in rows:
+            Invoice.wrap(row).to_python()
+
+    def construct_serialize():
+        for row in rows:
+            Invoice(**row).to_python()
+
+    for label, function in [
+            ('Invoice(**row), 2 reads:', construct),
+            ('Invoice.wrap(row), 2 reads:', wrap),
+            ('Invoice(**row).to_python():', construct_serialize),
+            ('Invoice.wrap(row).to_python():', wrap_serialize)]:
+        label = label.ljust(31)
+        elapsed = timeit.timeit(function, number=number)
+        print '    %s %.3fs (%.1fus per document)' % (
+            label, elapsed, elapsed * 1e6 / (number * len(rows)))
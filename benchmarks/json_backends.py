@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""Compares encoding the documents in `tests/fixtures/demos.py` with each JSON
+backend that can be imported. The first line is the way `to_json` used to
+work: convert every value with `for_json`, then call `json.dumps`. The
+backends get UUIDs, datetimes and decimals as they are.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/json_backends.py
+    demos documents, 10000 rounds:
+        for_json + json.dumps: 0.956s (19.1us per document)
+        json (default):        1.166s (23.3us per document)
+
+Only the standard library's json was installed for the run above. With it,
+leaving UUIDs, datetimes and decimals to the backend is no faster: over
+repeated runs the two lines differ by less than the noise between runs,
+either one coming out ahead. ujson and simplejson get a line each when
+they can be imported.
+"""
+
+import json
+import timeit
+
+from dictshield.base import get_json_backend, json_backends
+from fixtures import demos
+
+
+documents = [demos.mv, demos.order, demos.customer, demos.blogpost,
+             demos.tl]
+
+
+if __name__ == '__main__':
+    number = 10000
+    print 'demos documents, %d rounds:' % number
+
+    def baseline():
+        for doc in documents:
+            json.dumps(doc.to_json(encode=False))
+
+    cases = [('for_json + json.dumps:', baseline)]
+    for name in sorted(json_backends):
+        backend = json_backends[name]
+        def encode(backend=backend):
+            for doc in documents:
+                doc.to_json(backend=backend)
+        label = '%s%s:' % (name, ' (default)'
+                           if backend is get_json_backend() else '')
+        cases.append((label.ljust(len(cases[0][0])), encode))
+
+    for label, function in cases:
+        elapsed = timeit.timeit(function, number=number)
+        print '    %s %.3fs (%.1fus per document)' % (
+            label, elapsed, elapsed * 1e6 / (number * len(documents)))
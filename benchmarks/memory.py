@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+
+"""Compares the size of a document storing its fields in a `_data` dictionary
+against one storing them in `__slots__` via `meta = {'slots': True}`. Only
+the memory held by the document itself is counted, not the field values,
+which are shared by both.
+
+Reading a field of a slots document is slower, as it goes through a
+`SlotData` view made for each read, which the document doesn't keep so it
+stays small.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/memory.py
+    Per-instance size, 5 fields:
+        _data dictionary:  624 bytes
+        slots:             120 bytes (5.2x smaller)
+    Reading a field:
+        _data dictionary:  0.58us
+        slots:             1.34us
+"""
+
+import sys
+import timeit
+
+from dictshield.document import EmbeddedDocument
+from dictshield.fields import IntField, FloatField, StringField
+
+
+###
+### Models
+###
+
+class Product(EmbeddedDocument):
+    sku = IntField(min_value=1, max_value=9999, required=True)
+    title = StringField(max_length=30, required=True)
+    description = StringField()
+    price = FloatField(required=True)
+    num_in_stock = IntField()
+
+
+class SlotsProduct(EmbeddedDocument):
+    meta = {
+        'slots': True,
+    }
+    sku = IntField(min_value=1, max_value=9999, required=True)
+    title = StringField(max_length=30, required=True)
+    description = StringField()
+    price = FloatField(required=True)
+    num_in_stock = IntField()
+
+
+product_data = {
+    'sku': 1,
+    'title': 'Japanese Bowl',
+    'description': 'A Japanese laquered bowl',
+    'price': 3.99,
+    'num_in_stock': 3,
+}
+
+
+def instance_size(doc):
+    size = sys.getsizeof(doc)
+    if hasattr(doc, '__dict__'):
+        size += sys.getsizeof(doc.__dict__)
+        size += sys.getsizeof(doc.__dict__['_data'])
+    return size
+
+
+if __name__ == '__main__':
+    dict_size = instance_size(Product(**product_data))
+    slots_size = instance_size(SlotsProduct(**product_data))
+    print 'Per-instance size, %d fields:' % len(Product._fields)
+    print '    _data dictionary:  %d bytes' % dict_size
+    print '    slots:             %d bytes (%.1fx smaller)' % (
+        slots_size, float(dict_size) / slots_size)
+
+    print 'Reading a field:'
+    for label, doc in [('_data dictionary:', Product(**product_data)),
+                       ('slots:', SlotsProduct(**product_data))]:
+        elapsed = min(timeit.repeat(lambda: doc.title, number=500000,
+                                    repeat=3))
+        print '    %-18s %.2fus' % (label, elapsed * 1e6 / 500000)
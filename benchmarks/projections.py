@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""Compares serializing the public and owner views of the documents in
+`tests/fixtures/demos.py` with `make_json_publicsafe` and
+`make_json_ownersafe`, which serialize every field and trim the result,
+against `to_json(projection=...)`, which only visits the fields it keeps.
+The last two lines serialize both views, once with a call each and once
+with `fan_out`, which walks each document once for both.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/projections.py
+    demos documents, 10000 rounds:
+        make_json_ownersafe:          1.984s (39.7us per document)
+        to_json(projection='owner'):  1.082s (21.6us per document)
+        make_json_publicsafe:         1.351s (27.0us per document)
+        to_json(projection='public'): 0.798s (16.0us per document)
+        both make_json_*safe:         2.923s (58.5us per document)
+        fan_out owner and public:     2.058s (41.2us per document)
+
+Most of what `fan_out` takes is spent encoding the two views, so it only
+beats one `to_json` call per projection when views share a lot of values.
+"""
+
+import timeit
+
+from dictshield.encoder import fan_out
+from fixtures import demos
+
+
+documents = [demos.mv, demos.order, demos.customer, demos.blogpost, demos.u]
+
+
+if __name__ == '__main__':
+    number = 10000
+    print 'demos documents, %d rounds:' % number
+
+    def ownersafe():
+        for doc in documents:
+            doc.make_json_ownersafe(doc)
+
+    def owner():
+        for doc in documents:
+            doc.to_json(projection='owner')
+
+    def publicsafe():
+        for doc in documents:
+            doc.make_json_publicsafe(doc)
+
+    def public():
+        for doc in documents:
+            doc.to_json(projection='public')
+
+    def both_safe():
+        ownersafe()
+        publicsafe()
+
+    def both_fan_out():
+        for doc in documents:
+            fan_out(doc, ['owner', 'public'])
+
+    for label, function in [('make_json_ownersafe:', ownersafe),
+                            ("to_json(projection='owner'):", owner),
+                            ('make_json_publicsafe:', publicsafe),
+                            ("to_json(projection='public'):", public),
+                            ('both make_json_*safe:', both_safe),
+                            ('fan_out owner and public:', both_fan_out)]:
+        label = label.ljust(29)
+        elapsed = timeit.timeit(function, number=number)
+        print '    %s %.3fs (%.1fus per document)' % (
+            label, elapsed, elapsed * 1e6 / (number * len(documents)))
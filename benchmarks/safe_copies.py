@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+"""Compares trimming cached dictionaries without touching them, first with a
+deep copy followed by `make_ownersafe` and `make_publicsafe`, then with
+`inplace=False`, which builds new dictionaries instead.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/safe_copies.py
+    demos documents, 10000 rounds:
+        deepcopy + make_ownersafe:      4.350s (87.0us per document)
+        make_ownersafe(inplace=False):  0.724s (14.5us per document)
+        deepcopy + make_publicsafe:     4.165s (83.3us per document)
+        make_publicsafe(inplace=False): 0.756s (15.1us per document)
+"""
+
+import copy
+import timeit
+
+from fixtures import demos
+
+
+# Dictionaries as they would come out of a cache
+cached = [(type(doc), doc.to_python())
+          for doc in [demos.mv, demos.order, demos.customer, demos.blogpost,
+                      demos.u]]
+
+
+if __name__ == '__main__':
+    number = 10000
+    print 'demos documents, %d rounds:' % number
+
+    def deepcopy_owner():
+        for cls, data in cached:
+            cls.make_ownersafe(copy.deepcopy(data))
+
+    def fresh_owner():
+        for cls, data in cached:
+            cls.make_ownersafe(data, inplace=False)
+
+    def deepcopy_public():
+        for cls, data in cached:
+            cls.make_publicsafe(copy.deepcopy(data))
+
+    def fresh_public():
+        for cls, data in cached:
+            cls.make_publicsafe(data, inplace=False)
+
+    for label, function in [('deepcopy + make_ownersafe:', deepcopy_owner),
+                            ('make_ownersafe(inplace=False):', fresh_owner),
+                            ('deepcopy + make_publicsafe:', deepcopy_public),
+                            ('make_publicsafe(inplace=False):', fresh_public)]:
+        label = label.ljust(31)
+        elapsed = timeit.timeit(function, number=number)
+        print '    %s %.3fs (%.1fus per document)' % (
+            label, elapsed, elapsed * 1e6 / (number * len(cached)))
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+"""Compares `to_python` and `to_json(encode=False)`, which follow the
+serialization plans the metaclass builds, against the generic `_to_fields`
+they used to call.
+
+    Product, 100000 documents:
+        _to_fields for_python: 0.866s (8.7us per document)
+        to_python:             0.472s (4.7us per document)
+        _to_fields for_json:   0.998s (10.0us per document)
+        to_json(encode=False): 0.598s (6.0us per document)
+"""
+
+import timeit
+
+from dictshield.document import EmbeddedDocument
+from dictshield.fields import IntField, FloatField, StringField
+
+
+###
+### Model
+###
+
+class Product(EmbeddedDocument):
+    sku = IntField(min_value=1, max_value=9999, required=True)
+    title = StringField(max_length=30, required=True)
+    description = StringField()
+    price = FloatField(required=True)
+    num_in_stock = IntField()
+
+
+if __name__ == '__main__':
+    number = 100000
+    product = Product(sku=1, title='Japanese Bowl',
+                      description='A Japanese laquered bowl', price=3.99,
+                      num_in_stock=3)
+
+    for_python = lambda f, v: f.for_python(v)
+    for_json = lambda f, v: f.for_json(v)
+    cases = [
+        ('_to_fields for_python:', lambda: product._to_fields(for_python)),
+        ('to_python:            ', product.to_python),
+        ('_to_fields for_json:  ', lambda: product._to_fields(for_json)),
+        ('to_json(encode=False):', lambda: product.to_json(encode=False)),
+    ]
+
+    print 'Product, %d documents:' % number
+    for label, function in cases:
+        elapsed = timeit.timeit(function, number=number)
+        print '    %s %.3fs (%.1fus per document)' % (label, elapsed,
+                                                     elapsed * 1e6 / number)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+
+"""Times loading a million stored documents, keyed by the string form of their
+UUIDs as they would come out of a database, with the constructor and with
+`wrap`, and counts the calls to `os.urandom` this makes.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/uuids.py
+    1000000 stored documents:
+        Reading(**row).id:     4.143s (4.14us per document, 0 os.urandom calls)
+        Reading.wrap(row).id:  4.019s (4.02us per document, 0 os.urandom calls)
+
+Before constructors waited to see whether they were given a UUID before
+making one, they made one for every document only to replace it with the
+stored one:
+
+    1000000 stored documents:
+        Reading(**row).id:     18.899s (18.90us per document, 1000000 os.urandom calls)
+        Reading.wrap(row).id:  7.424s (7.42us per document, 0 os.urandom calls)
+"""
+
+import os
+import time
+import uuid
+
+from dictshield.document import Document
+from dictshield.fields import IntField, StringField
+
+
+class Reading(Document):
+    sensor = StringField()
+    value = IntField()
+
+
+rows = [{'_id': str(uuid.uuid4()), 'sensor': 'sensor %d' % (i % 100),
+         'value': i}
+        for i in xrange(1000000)]
+
+urandom_calls = [0]
+urandom = os.urandom
+
+def counting_urandom(n):
+    urandom_calls[0] += 1
+    return urandom(n)
+
+
+def construct():
+    for row in rows:
+        Reading(**row).id
+
+def wrap():
+    for row in rows:
+        Reading.wrap(row).id
+
+
+if __name__ == '__main__':
+    os.urandom = counting_urandom
+    print '%d stored documents:' % len(rows)
+    for label, load in [('Reading(**row).id:', construct),
+                        ('Reading.wrap(row).id:', wrap)]:
+        urandom_calls[0] = 0
+        start = time.time()
+        load()
+        elapsed = time.time() - start
+        print '    %-22s %.3fs (%.2fus per document, %d os.urandom calls)' % (
+            label, elapsed, elapsed * 1e6 / len(rows), urandom_calls[0])
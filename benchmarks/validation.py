@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+
+"""Compares the validator `DocumentMetaclass` compiles for a document class
+against the interpreted loop in `BaseDocument.validate`, both validating
+every field, and then validating a document again after setting one field,
+which only checks that field and the required ones.
+
+    Product, 200000 validations:
+        interpreted:  1.295s
+        compiled:     0.527s (2.5x)
+        incremental:  0.873s (1.5x, one field set before each)
+"""
+
+import timeit
+
+from dictshield.document import EmbeddedDocument
+from dictshield.fields import IntField, FloatField, StringField
+
+
+###
+### Models
+###
+
+class Product(EmbeddedDocument):
+    sku = IntField(min_value=1, max_value=9999, required=True)
+    title = StringField(max_length=30, required=True)
+    description = StringField()
+    price = FloatField(required=True)
+    num_in_stock = IntField()
+
+
+class CompiledProduct(Product):
+    meta = {
+        'compiled_validation': True,
+    }
+
+
+product_data = {
+    'sku': 1,
+    'title': 'Japanese Bowl',
+    'description': 'A Japanese laquered bowl',
+    'price': 3.99,
+    'num_in_stock': 3,
+}
+
+interpreted_product = Product(**product_data)
+compiled_product = CompiledProduct(**product_data)
+
+
+def validate_after_set():
+    interpreted_product.num_in_stock = 4
+    interpreted_product.validate()
+
+
+if __name__ == '__main__':
+    number = 200000
+    print 'Product, %d validations:' % number
+    interpreted_time = min(timeit.repeat(
+        lambda: interpreted_product.validate(full=True),
+        number=number, repeat=3))
+    print '    interpreted:  %.3fs' % interpreted_time
+    compiled_time = min(timeit.repeat(
+        lambda: compiled_product.validate(full=True),
+        number=number, repeat=3))
+    print '    compiled:     %.3fs (%.1fx)' % (compiled_time,
+                                               interpreted_time / compiled_time)
+    interpreted_product.validate()
+    incremental_time = min(timeit.repeat(validate_after_set,
+                                         number=number, repeat=3))
+    print '    incremental:  %.3fs (%.1fx, one field set before each)' % (
+        incremental_time, interpreted_time / incremental_time)
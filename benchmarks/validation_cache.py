@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+
+"""Compares validating documents whose values repeat a lot, as in a large
+import, with and without `cache_validation` on the fields with expensive
+checks: an email address and a custom check against a reference table.
+
+Run it from the top of the repository:
+
+    $ PYTHONPATH=.:tests python benchmarks/validation_cache.py
+    10000 documents, 500 distinct addresses, 4 countries:
+        uncached:  0.734s (73.4us per document)
+        cached:    0.056s (5.6us per document)
+        email cache: 29500 hits, 500 misses
+"""
+
+import time
+import timeit
+
+from dictshield.document import EmbeddedDocument
+from dictshield.fields import EmailField, StringField
+
+
+def known_country(value):
+    # Stands for a lookup in a reference table
+    time.sleep(0.00001)
+    return len(value) == 2
+
+
+class Customer(EmbeddedDocument):
+    email = EmailField()
+    country = StringField(validation=known_country)
+
+
+class CachedCustomer(EmbeddedDocument):
+    email = EmailField(cache_validation=1000)
+    country = StringField(validation=known_country, cache_validation=100)
+
+
+rows = [{'email': 'customer%d@example.com' % (i % 500),
+         'country': ['be', 'nl', 'fr', 'de'][i % 4]}
+        for i in xrange(10000)]
+
+
+if __name__ == '__main__':
+    print '%d documents, 500 distinct addresses, 4 countries:' % len(rows)
+    for label, cls in [('uncached:', Customer), ('cached:', CachedCustomer)]:
+        docs = [cls(**row) for row in rows]
+
+        def validate():
+            for doc in docs:
+                doc.validate(full=True)
+
+        elapsed = min(timeit.repeat(validate, number=1, repeat=3))
+        print '    %-10s %.3fs (%.1fus per document)' % (
+            label, elapsed, elapsed * 1e6 / len(docs))
+
+    cache = CachedCustomer.email.validation_cache
+    print '    email cache: %d hits, %d misses' % (cache.hits, cache.misses)
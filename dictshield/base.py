@@ -21,8 +21,16 @@ An `InvalidShield` exception is thrown when the input data can't be mapped
 to a `Document`.
 """
 
+import binascii
+import copy
+import datetime
+import decimal
+import functools
+import types
 import uuid
 
+from dictshield.datastructures import LRUCache
+
 ### If you're using Python 2.6, you should use simplejson
 try:
     import simplejson as json
@@ -30,6 +38,135 @@ except:
     import json
 
 
+###
+### JSON backends
+###
+
+def _json_default(value):
+    """Encodes the values fields hold that JSON has no type for, the same way
+    `for_json` of their fields does.
+    """
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return unicode(value)
+    raise TypeError('%r is not JSON serializable' % (value,))
+
+def _json_prepare(value):
+    """Returns a copy of `value` with everything `_json_default` handles
+    converted, for libraries that can't call it while encoding.
+    """
+    if isinstance(value, dict):
+        return dict((k, _json_prepare(v)) for k, v in value.iteritems())
+    if isinstance(value, (list, tuple)):
+        return [_json_prepare(v) for v in value]
+    if isinstance(value, (uuid.UUID, datetime.date, decimal.Decimal)):
+        return _json_default(value)
+    return value
+
+class JSONBackend(object):
+    """A JSON library DictShield can encode and decode with. `dumps` must
+    encode `uuid.UUID`, `datetime` and `decimal.Decimal` values the way
+    `for_json` of their fields does, so documents can hand them over as they
+    are.
+    """
+
+    def __init__(self, name, dumps, loads):
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+    def __repr__(self):
+        return '<JSONBackend: %s>' % self.name
+
+def _ujson_backend():
+    import ujson
+    try:
+        ujson.dumps(uuid.UUID(int=0), default=_json_default)
+        dumps = functools.partial(ujson.dumps, default=_json_default)
+    except TypeError:
+        # Older versions don't take `default`
+        dumps = lambda obj: ujson.dumps(_json_prepare(obj))
+    return JSONBackend('ujson', dumps, ujson.loads)
+
+def _simplejson_backend():
+    import simplejson
+    # Decimals are strings, like DecimalField.for_json makes them
+    dumps = functools.partial(simplejson.dumps, default=_json_default,
+                              use_decimal=False)
+    return JSONBackend('simplejson', dumps, simplejson.loads)
+
+def _stdlib_json_backend():
+    import json as stdlib_json
+    dumps = functools.partial(stdlib_json.dumps, default=_json_default)
+    return JSONBackend('json', dumps, stdlib_json.loads)
+
+# Probed in this order, fastest first
+_json_backend_factories = [_ujson_backend,
+                           _simplejson_backend,
+                           _stdlib_json_backend]
+
+# Name => every backend that could be imported or was registered
+json_backends = {}
+
+# Used when no backend is given, see `set_json_backend`
+_json_backend = None
+
+def register_json_backend(backend):
+    """Makes `backend`, a `JSONBackend`, available by name.
+    """
+    json_backends[backend.name] = backend
+
+def get_json_backend(backend=None):
+    """Returns the backend named `backend`, or `backend` itself if it's a
+    `JSONBackend`. Returns the default backend if `backend` is None.
+    """
+    if backend is None:
+        return _json_backend
+    if isinstance(backend, JSONBackend):
+        return backend
+    try:
+        return json_backends[backend]
+    except KeyError:
+        raise ValueError('Unknown JSON backend: %s' % backend)
+
+def set_json_backend(backend):
+    """Makes `backend`, a name or a `JSONBackend`, the default backend.
+    """
+    global _json_backend
+    if isinstance(backend, JSONBackend):
+        register_json_backend(backend)
+    _json_backend = get_json_backend(backend)
+
+def _json_round_trips(backend):
+    """Returns True if `backend` decodes what it encodes exactly, which some
+    libraries don't do with floats by default.
+    """
+    sample = {'float': 0.1 + 0.2, 'text': u'caf\xe9', 'id': uuid.UUID(int=1)}
+    expected = {'float': 0.1 + 0.2, 'text': u'caf\xe9', 'id': str(sample['id'])}
+    try:
+        return backend.loads(backend.dumps(sample)) == expected
+    except Exception:
+        return False
+
+def _probe_json_backends():
+    """Registers every backend that can be imported and makes the first one
+    that round trips exactly the default.
+    """
+    for factory in _json_backend_factories:
+        try:
+            backend = factory()
+        except ImportError:
+            continue
+        register_json_backend(backend)
+        if _json_backend is None and _json_round_trips(backend):
+            set_json_backend(backend)
+
+_probe_json_backends()
+
+
 ###
 ### Exceptions
 ###
@@ -51,6 +188,10 @@ class ShieldException(Exception):
     def __str__(self):
         return '%s - %s:%s)' % (self.reason, self.field_name, self.field_value)
 
+    def __reduce__(self):
+        return (self.__class__, (self.reason, self.field_name,
+                                 self.field_value))
+
 # Here from my younger, less venerable days.
 DictPunch = ShieldException
 
@@ -59,13 +200,27 @@ DictPunch = ShieldException
 ### Fields
 ###
 
+# Stands for a value `_cached_check` hasn't seen
+_UNCACHED = object()
+
 class BaseField(object):
     """A base class for fields in a DictShield document. Instances of this class
     may be added to subclasses of `Document` to define a document's schema.
     """
 
+    # Values that can change in place, like lists, are validated every time
+    _mutable = False
+
+    # An LRUCache of validation outcomes, if `cache_validation` was given
+    validation_cache = None
+
+    # Fields that fill in empty values as they're set, like `UUIDField`, are
+    # only set by constructors once they know no value was given
+    _fills_empty = False
+
     def __init__(self, uniq_field=None, field_name=None, required=False,
-                 default=None, id_field=False, validation=None, choices=None, description=None):
+                 default=None, id_field=False, validation=None, choices=None, description=None,
+                 cache_validation=None):
         self.uniq_field = '_id' if id_field else uniq_field or field_name
         self.field_name = field_name
         self.required = required
@@ -75,6 +230,41 @@ class BaseField(object):
         self.id_field = id_field
         self.description = description
 
+        # Remembers what validating up to `cache_validation` values gave,
+        # see `_cached_check`
+        if cache_validation:
+            if self._mutable:
+                raise InvalidShield('%s values can change in place, so their '
+                                    'validation can\'t be cached'
+                                    % self.__class__.__name__)
+            self.validation_cache = LRUCache(cache_validation)
+        else:
+            self.validation_cache = None
+
+    def __reduce_ex__(self, protocol):
+        """Fields that belong to a document class are pickled as a reference
+        to that class, which is itself pickled by reference. This keeps the
+        owner back-pointers and self-referencing `EmbeddedDocumentField`s
+        intact and avoids pickling things like lambda defaults.
+        """
+        owner = getattr(self, 'owner_document', None)
+        if owner is not None:
+            for name, field in owner._fields.items():
+                if field is self:
+                    return (_document_field, (owner, name))
+        return super(BaseField, self).__reduce_ex__(protocol)
+
+    def __copy__(self):
+        copied = self.__class__.__new__(self.__class__)
+        copied.__dict__.update(self.__dict__)
+        return copied
+
+    def __deepcopy__(self, memo):
+        copied = self.__class__.__new__(self.__class__)
+        memo[id(self)] = copied
+        copied.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return copied
+
     def __get__(self, instance, owner):
         """Descriptor for retrieving a value from a field in a document. Do
         any necessary conversion between Python and `DictShield` types.
@@ -83,19 +273,39 @@ class BaseField(object):
             # Document class being used rather than a document object
             return self
 
-        value = instance._data.get(self.field_name)
+        data = instance._data
+        value = data.get(self.field_name)
 
         if value is None:
-            value = self.default
-            # Allow callable default values
-            if callable(value):
-                value = value()
+            # Documents made by `wrap` set fields from their input on demand
+            if instance._raw is not None and self.field_name not in data:
+                value = instance._hydrate_field(self)
+            if value is None:
+                value = self.default
+                # Allow callable default values
+                if callable(value):
+                    value = value()
         return value
 
     def __set__(self, instance, value):
         """Descriptor for assigning a value to a field in a document.
         """
+        self._store(instance, value)
+
+    def _store(self, instance, value):
+        """Stores `value` as the field's value in `instance`, noting that the
+        field changed since the document was last validated and since it was
+        last marked clean. Fields that override `__set__` should store values
+        through this and say so with `_uses_store = True`, or they are
+        validated every time.
+        """
         instance._data[self.field_name] = value
+        dirty = instance._dirty_fields
+        if dirty is not None:
+            dirty.add(self.field_name)
+        changed = instance._changed_fields
+        if changed is not None:
+            changed.add(self.field_name)
 
     def for_python(self, value):
         """Convert a DictShield type into native Python value
@@ -113,23 +323,68 @@ class BaseField(object):
         pass
 
     def _validate(self, value):
+        if self.validation_cache is not None:
+            self._cached_check(self._validate_uncached, value)
+        else:
+            self._validate_uncached(value)
+
+    def _cached_check(self, check, value):
+        """Calls `check(value)`, unless it was called for an equal value of
+        the same type before, in which case its outcome is repeated: nothing
+        or the same exception. Unhashable values are always checked.
+
+        The cache belongs to the field, so it must be cleared if the
+        field's constraints are changed.
+        """
+        cache = self.validation_cache
+        try:
+            key = (check.__name__, type(value), value)
+            error = cache.get(key, _UNCACHED)
+        except TypeError:
+            return check(value)
+        if error is None:
+            return
+        if error is not _UNCACHED:
+            raise error
+
+        try:
+            check(value)
+        except (ShieldException, ValueError, AttributeError,
+                AssertionError), error:
+            cache[key] = error
+            raise
+        cache[key] = None
+
+    def _validate_uncached(self, value):
         # check choices
         if self.choices is not None:
             if value not in self.choices:
                 raise ShieldException("Value must be one of %s."
-                    % unicode(self.choices))
+                    % unicode(self.choices), self.field_name, value)
 
         # check validation argument
         if self.validation is not None:
             if callable(self.validation):
                 if not self.validation(value):
-                    raise ShieldException('Value does not match custom' \
-                                          'validation method.')
+                    raise ShieldException('Value does not match custom ' \
+                                          'validation method.',
+                                          self.field_name, value)
             else:
                 raise ValueError('validation argument must be a callable.')
 
         self.validate(value)
 
+    def _validate_source(self, prefix, namespace):
+        """Returns source lines equivalent to calling `validate` on a local
+        named `value`, for use by compiled document validators. Names the
+        lines reference are put in `namespace`, prefixed with `prefix`.
+
+        Fields may override this to fold their constraints into the
+        generated code. The lines must not rebind `value`.
+        """
+        namespace[prefix + 'validate'] = self.validate
+        return ['%svalidate(value)' % prefix]
+
     def _jsonschema_default(self):
         if callable(self.default):
             # jsonschema doesn't support procedural defaults
@@ -156,6 +411,20 @@ class BaseField(object):
         else:
             return None
 
+    def _projected_json(self, projection):
+        """Returns a function converting values of the field for JSON, with
+        any documents they hold serialized through `projection`. Most fields
+        hold no documents and just return `for_json`.
+        """
+        return self.for_json
+
+    def _projected_json_many(self, value, projections):
+        """Returns a dictionary mapping each projection in `projections` to
+        `value` converted for JSON through it. Values holding no documents
+        are converted once and shared.
+        """
+        return dict.fromkeys(projections, self.for_json(value))
+
     def for_jsonschema(self):
         """Generate the jsonschema by mapping the value of all methods beginning
         `_jsonschema_' to a key that is the name of the method afte `_jsonschema_'.
@@ -164,20 +433,52 @@ class BaseField(object):
         """
         
         schema = {}
-        for func_name in filter(lambda x: x.startswith('_jsonschema'), dir(self)):
-            attr_name = func_name.split('_')[-1]
+        for attr_name, func_name in _jsonschema_table(self.__class__):
             attr_value = getattr(self, func_name)()
             if attr_value is not None:
                 schema[attr_name] = attr_value
         return schema
 
+def _document_field(document_class, name):
+    """Unpickles a field pickled by `BaseField.__reduce_ex__`.
+    """
+    return document_class._fields[name]
+
+def _parse_uuid(value, binary=False):
+    """Returns the `uuid.UUID` for the string `value`, which holds its hex
+    digits in any form `uuid.UUID` accepts, or with `binary` its 16 bytes.
+    The usual forms are parsed without the checks `uuid.UUID` repeats for
+    each.
+    """
+    if binary and isinstance(value, str) and len(value) == 16:
+        digits = binascii.hexlify(value)
+    else:
+        digits = value.replace('-', '')
+        if len(digits) != 32:
+            # Braces, 'urn:uuid:' prefixes and mistakes
+            return uuid.UUID(value)
+    parsed = object.__new__(uuid.UUID)
+    parsed.__dict__['int'] = int(digits, 16)
+    return parsed
+
 class UUIDField(BaseField):
     """A field that stores a valid UUID value and optionally auto-populates
     empty values with new UUIDs.
+
+    Constructors and `wrap` only make a UUID for documents given none, so
+    loading stored documents with their UUIDs never makes one. With
+    `binary`, 16-byte strings are taken as the raw bytes of a UUID, as some
+    databases store them.
     """
 
-    def __init__(self, auto_fill=True, **kwargs):
+    _fills_empty = True
+
+    # `__set__` stores values through `_store`
+    _uses_store = True
+
+    def __init__(self, auto_fill=True, binary=False, **kwargs):
         self.auto_fill = auto_fill
+        self.binary = binary
         super(UUIDField, self).__init__(**kwargs)
 
     def __set__(self, instance, value):
@@ -185,12 +486,11 @@ class UUIDField(BaseField):
         auto-populate any empty values should auto_fill be set to True.
         """
         if not value:
-            value = uuid.uuid4()
+            value = uuid.uuid4() if self.auto_fill else None
+        elif isinstance(value, (str, unicode)):
+            value = _parse_uuid(value, self.binary)
 
-        if isinstance(value, (str, unicode)):
-            value = uuid.UUID(value)
-
-        instance._data[self.field_name] = value
+        self._store(instance, value)
 
     def _jsonschema_type(self):
         return 'string'
@@ -201,21 +501,399 @@ class UUIDField(BaseField):
         """
         if not isinstance(value, (uuid.UUID,)):
             try:
-                uuid.UUID(value)
+                _parse_uuid(value, self.binary)
             except ValueError:
                 raise ShieldException('Not a valid UUID value',
                     self.field_name, value)
 
+    # The JSON backends encode UUIDs like `for_json`
+    _json_native = True
+
     def for_json(self, value):
         """Return a JSON safe version of the UUID object.
         """
 
         return str(value)
 
+###
+### Slots storage
+###
+
+# Per-document state that documents using slots keep in slots of their own
+_instance_slots = ('_raw', '_dirty_fields', '_changed_fields', '_snapshots')
+
+def _slot_name(attr_name):
+    """Returns the name of the slot that stores the field `attr_name` in
+    documents using `meta = {'slots': True}`.
+    """
+    return '_slot_%s' % attr_name
+
+class SlotData(object):
+    """A dictionary-like view of the field values of a document that stores
+    them in `__slots__`. Such documents return one from their `_data`
+    property, so fields read and write the slots through the same interface
+    as the `_data` dictionary of other documents. A slot that was never
+    assigned is treated as a missing key.
+
+    A new view is made each time `_data` is read, which makes reading a
+    field about twice as slow as with a dictionary, see
+    benchmarks/memory.py. Keeping one in each document instead would add
+    a slot, a view object and a reference cycle to every document read.
+    """
+    __slots__ = ('_document', '_slots')
+
+    def __init__(self, document):
+        self._document = document
+        self._slots = document._data_slots
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self._document, self._slots[key])
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        setattr(self._document, self._slots[key], value)
+
+    def __delitem__(self, key):
+        try:
+            delattr(self._document, self._slots[key])
+        except AttributeError:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self._slots and hasattr(self._document, self._slots[key])
+
+    def __iter__(self):
+        return (key for key, slot in self._slots.iteritems()
+                if hasattr(self._document, slot))
+
+    def __len__(self):
+        return sum(1 for key in self)
+
+    def get(self, key, default=None):
+        slot = self._slots.get(key)
+        if slot is None:
+            return default
+        return getattr(self._document, slot, default)
+
+    def keys(self):
+        return [key for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def iteritems(self):
+        return ((key, self[key]) for key in self)
+
+    def values(self):
+        return [self[key] for key in self]
+
+###
+### JSON Schema
+###
+
+# Field class => [(schema key, method name)] for its `_jsonschema_' methods
+_jsonschema_tables = {}
+
+# Document class => its schema, and (class, 'json') => the encoded schema.
+# Cleared whenever a class gains a field, as schemas embed each other.
+_jsonschema_cache = {}
+
+def _jsonschema_table(field_class):
+    """Returns the schema keys and `_jsonschema_' method names of
+    `field_class`, only walking `dir` the first time.
+    """
+    table = _jsonschema_tables.get(field_class)
+    if table is None:
+        table = [(func_name.split('_')[-1], func_name)
+                 for func_name in dir(field_class)
+                 if func_name.startswith('_jsonschema')]
+        _jsonschema_tables[field_class] = table
+    return table
+
+
+###
+### Class compilation
+###
+
+def _compile_function(name, lines, namespace):
+    """Compiles the source in `lines`, which must define a function called
+    `name`, against `namespace` and returns the function.
+
+    The generated source is kept on the function as `_source` to make
+    debugging the generated code less painful.
+    """
+    source = '\n'.join(lines) + '\n'
+    code = compile(source, '<dictshield %s>' % name, 'exec')
+    exec code in namespace
+    function = namespace[name]
+    function._source = source
+    return function
+
+def _overrides(field, method_name):
+    """Returns True if `field` implements `method_name` differently from
+    `BaseField`.
+    """
+    method = getattr(type(field), method_name)
+    return method.im_func is not getattr(BaseField, method_name).im_func
+
+def _default_expression(field, constant, namespace):
+    """Returns a source expression evaluating to the default value of `field`
+    and puts any constant it references in `namespace` under `constant`.
+    """
+    if field.default is None:
+        return 'None'
+    namespace[constant] = field.default
+    if callable(field.default):
+        return '%s()' % constant
+    return constant
+
+def _set_unknown(document, name, value):
+    """Handles input keys to a document's constructor that are not fields.
+    """
+    try:
+        if name == '_id':
+            name = 'id'
+        setattr(document, name, value)
+    # Put a diaper on the keys that don't belong and send 'em home
+    except AttributeError:
+        pass
+
+# Marks plan entries whose value must be read through the field's `__get__`
+_DESCRIPTOR = object()
+
+def _json_native(field):
+    """Returns True if the JSON backends encode `field.for_python(value)`
+    exactly like `field.for_json(value)`, as declared by the `_json_native`
+    attribute of the class that implements `for_json`.
+    """
+    for klass in type(field).__mro__:
+        if 'for_json' in klass.__dict__:
+            return klass.__dict__.get('_json_native', False)
+    return False
+
+def _uses_store(field):
+    """Returns True if `field` is set through `BaseField._store`, which keeps
+    track of the fields set since the last validation, as declared by the
+    `_uses_store` attribute of the class that implements `__set__`.
+    """
+    for klass in type(field).__mro__:
+        if '__set__' in klass.__dict__:
+            return klass is BaseField or \
+                   klass.__dict__.get('_uses_store', False)
+    return False
+
+def _serialization_plan(cls, converter_name, native=False, projection=None):
+    """Returns a tuple of `(uniq_field, key, converter, default)` for each
+    field of `cls`, where `converter` is the field's bound `converter_name`
+    method. `key` is the field's key in `_data`, or the attribute name when
+    `default` is `_DESCRIPTOR` and the field's own `__get__` must be used.
+
+    With `native`, fields the JSON backends encode themselves are converted
+    with `for_python` instead. With `projection`, only the fields the
+    projection keeps are included, converted for JSON by the function their
+    `_projected_json` returns.
+    """
+    if projection is not None:
+        keys = cls._projection_keys[projection]
+    plan = []
+    for attr_name, field in cls._fields.items():
+        if projection is not None and field.uniq_field not in keys:
+            continue
+        if native and _json_native(field):
+            converter = field.for_python
+        elif projection is not None:
+            converter = field._projected_json(projection)
+        else:
+            converter = getattr(field, converter_name)
+        if _overrides(field, '__get__'):
+            plan.append((field.uniq_field, attr_name, converter, _DESCRIPTOR))
+        else:
+            plan.append((field.uniq_field, field.field_name, converter,
+                         field.default))
+    return tuple(plan)
+
+def _projection_keys(cls):
+    """Returns the keys of the serialized document each projection of `cls`
+    keeps. 'owner' drops internal and private fields and 'public' keeps only
+    the public fields, or the same as 'owner' if there are none. Each named
+    projection in `_projections` keeps the fields it lists.
+    """
+    keys = set(field.uniq_field for field in cls._fields.values())
+    keys.update(['_cls', '_types'])
+    owner = frozenset(keys - cls._hidden_field_set)
+    if cls._public_field_set is None:
+        public = owner
+    else:
+        public = frozenset(keys & cls._public_field_set)
+    projection_keys = {'owner': owner, 'public': public}
+    for projection, field_names in cls._projections.items():
+        projection_keys[projection] = frozenset(keys.intersection(field_names))
+    return projection_keys
+
+def _compile_init_data(cls):
+    """Generates an `_init_data` method specialised for `cls`.
+
+    Defaults are applied as straight-line code, writing directly to `_data`
+    for fields that use `BaseField.__set__` and calling the field's own
+    `__set__` otherwise. Input values are dispatched through tables mapping
+    input keys, including the `_id` alias, to data keys or setters. Fields
+    that fill in empty values without a default are set to None first and
+    filled in last if they weren't given a value.
+    """
+    namespace = {'_set_unknown': _set_unknown}
+    slots = cls._meta.get('slots', False)
+    if slots:
+        lines = ['def _init_data(self, values):']
+        lines.extend('    self.%s = None' % name for name in _instance_slots)
+    else:
+        lines = ['def _init_data(self, values):',
+                 '    data = self._data = {}']
+    seen_keys = set()
+    fills = []
+
+    for i, (attr_name, field) in enumerate(cls._fields.items()):
+        key = field.field_name
+        if _overrides(field, '__get__') or key in seen_keys:
+            lines.append('    setattr(self, %r, getattr(self, %r, None))'
+                         % (attr_name, attr_name))
+            continue
+        seen_keys.add(key)
+
+        value = _default_expression(field, 'default_%d' % i, namespace)
+        if field._fills_empty and field.default is None:
+            namespace['set_%d' % i] = field.__set__
+            if slots:
+                stored = 'self.%s' % _slot_name(attr_name)
+            else:
+                stored = 'data[%r]' % key
+            lines.append('    %s = None' % stored)
+            fills.extend(['    if %s is None:' % stored,
+                          '        set_%d(self, None)' % i])
+        elif _overrides(field, '__set__'):
+            namespace['set_%d' % i] = field.__set__
+            lines.append('    set_%d(self, %s)' % (i, value))
+        elif slots:
+            lines.append('    self.%s = %s' % (_slot_name(attr_name), value))
+        else:
+            lines.append('    data[%r] = %s' % (key, value))
+
+    # Map every input key to a data key or a setter
+    plain_keys = {}
+    setters = {}
+    descriptors = [(name, getattr(cls, name, None)) for name in cls._fields]
+    descriptors.append(('id', getattr(cls, 'id', None)))
+    for name, field in descriptors:
+        if not isinstance(field, BaseField) or _overrides(field, '__get__'):
+            continue
+        names = [name, '_id'] if name == 'id' else [name]
+        for input_key in names:
+            if _overrides(field, '__set__'):
+                setters[input_key] = field.__set__
+            elif slots:
+                plain_keys[input_key] = cls._data_slots[field.field_name]
+            else:
+                plain_keys[input_key] = field.field_name
+    namespace['plain_keys'] = plain_keys
+    namespace['setters'] = setters
+
+    if slots:
+        store = 'setattr(self, plain_keys[name], value)'
+    else:
+        store = 'data[plain_keys[name]] = value'
+    lines.extend([
+        '    for name, value in values.iteritems():',
+        '        if name in plain_keys:',
+        '            %s' % store,
+        '        elif name in setters:',
+        '            setters[name](self, value)',
+        '        else:',
+        '            _set_unknown(self, name, value)',
+    ])
+    lines.extend(fills)
+    return _compile_function('_init_data', lines, namespace)
+
+def _compile_validate_compiled(cls):
+    """Generates a `_validate_compiled` method specialised for `cls`.
+
+    The generated function is equivalent to `BaseDocument.validate` with
+    each field's `choices`, `validation` and constraints folded in as
+    constants, so validating a document is a single flat function call.
+    """
+    namespace = {'ShieldException': ShieldException}
+    lines = ['def _validate_compiled(self):',
+             '    data = self._data']
+
+    for i, (attr_name, field) in enumerate(cls._fields.items()):
+        prefix = 'f%d_' % i
+        field_name = field.field_name
+
+        if _overrides(field, '__get__'):
+            lines.append('    value = getattr(self, %r)' % attr_name)
+        else:
+            lines.append('    value = data.get(%r)' % field_name)
+            if field.default is not None:
+                default = _default_expression(field, prefix + 'default',
+                                              namespace)
+                lines.extend(['    if value is None:',
+                              '        value = %s' % default])
+
+        checks = []
+        if _overrides(field, '_validate') or \
+           field.validation_cache is not None:
+            namespace[prefix + '_validate'] = field._validate
+            checks.append('%s_validate(value)' % prefix)
+        else:
+            if field.choices is not None:
+                namespace[prefix + 'choices'] = field.choices
+                namespace[prefix + 'choices_reason'] = (
+                    'Value must be one of %s.' % unicode(field.choices))
+                checks.extend([
+                    'if value not in %schoices:' % prefix,
+                    '    raise ShieldException(%schoices_reason, %r, value)'
+                    % (prefix, field_name)])
+            if field.validation is not None and callable(field.validation):
+                namespace[prefix + 'validation'] = field.validation
+                checks.extend([
+                    'if not %svalidation(value):' % prefix,
+                    '    raise ShieldException(%r, %r, value)'
+                    % ('Value does not match custom validation method.',
+                       field_name)])
+            elif field.validation is not None:
+                checks.append("raise ValueError('validation argument must "
+                              "be a callable.')")
+            checks.extend(field._validate_source(prefix, namespace))
+
+        lines.extend(['    if value is not None and value != \'\':',
+                      '        try:'])
+        lines.extend('            ' + line for line in checks)
+        lines.extend([
+            '        except (ValueError, AttributeError, AssertionError):',
+            '            raise ShieldException(\'Invalid value\', %r, value)'
+            % field_name])
+        if field.required:
+            lines.extend([
+                '    else:',
+                '        raise ShieldException(\'Required field missing\', '
+                '%r, value)' % field_name])
+
+    lines.append('    return None')
+    return _compile_function('_validate_compiled', lines, namespace)
+
+# Document class => its fields that verify URLs, themselves or through lists
+# and embedded documents. Cleared whenever a class gains a field.
+_url_fields_cache = {}
+
 ###
 ### Metaclass design
 ###
 
+# Class attributes of documents the permission sets and projection plans are
+# built from, see `SafeableMixin`
+_permission_attrs = frozenset(['_internal_fields', '_private_fields',
+                               '_public_fields', '_projections'])
+
 class DocumentMetaclass(type):
     """Metaclass for all documents.
     """
@@ -230,6 +908,7 @@ class DocumentMetaclass(type):
         class_name = [name]
         superclasses = {}
         simple_class = True
+        slots = False
         for base in bases:
             # Include all fields present in superclasses
             if hasattr(base, '_fields'):
@@ -249,6 +928,9 @@ class DocumentMetaclass(type):
                 else:
                     simple_class = False
 
+                # Subclasses of slots-backed documents must use slots too
+                slots = slots or base._meta.get('slots', False)
+
                 if base._meta.get('mixin', False) == True:
                     # A dictshield mixin means it adds fields with no effet
                     # on class hierarchy
@@ -281,14 +963,151 @@ class DocumentMetaclass(type):
                 doc_fields[attr_name] = attr_value
         attrs['_fields'] = doc_fields
 
+        # Lay out storage for the fields in __slots__ if asked to
+        if meta.get('slots', slots):
+            meta['slots'] = True
+            field_slots = [_slot_name(attr_name) for attr_name in doc_fields]
+            field_slots = [slot for slot in field_slots
+                           if not any(hasattr(base, slot) for base in bases)]
+            field_slots.extend(
+                name for name in _instance_slots
+                if not any(isinstance(getattr(base, name, None),
+                                      types.MemberDescriptorType)
+                           for base in bases))
+            attrs['__slots__'] = tuple(attrs.get('__slots__', ())) + \
+                                 tuple(field_slots)
+            attrs['_data'] = property(SlotData)
+
         new_class = super_new(cls, name, bases, attrs)
         for field in new_class._fields.values():
             field.owner_document = new_class
 
+        new_class._compile_class()
         return new_class
 
     def add_to_class(self, name, value):
+        """Sets `name` to `value` on the class. A field is registered in
+        `_fields` as if it had been declared on the class.
+        """
+        if not isinstance(value, BaseField):
+            setattr(self, name, value)
+            return
+
+        if self._meta.get('slots', False):
+            raise InvalidShield('Fields cannot be added to %s, it stores them '
+                                'in __slots__' % self.__name__)
+
+        value.field_name = name
+        if not value.uniq_field:
+            value.uniq_field = name
         setattr(self, name, value)
+        self._fields[name] = value
+        value.owner_document = self
+
+        self._compile_class()
+        _jsonschema_cache.clear()
+        _url_fields_cache.clear()
+
+    def __setattr__(self, name, value):
+        """Rebuilds what's derived from the permission lists and projections
+        of the class, and of its subclasses, when one of them is assigned.
+        """
+        super(DocumentMetaclass, self).__setattr__(name, value)
+        if name in _permission_attrs and '_init_data' in self.__dict__:
+            classes = [self]
+            for klass in classes:
+                klass._compile_class()
+                classes.extend(klass.__subclasses__())
+            _jsonschema_cache.clear()
+
+    def _compile_class(self):
+        """Generates the methods DictShield specialises for each document
+        class. Must be called again whenever `_fields` changes.
+        """
+        if self._meta.get('slots', False):
+            self._data_slots = {}
+            for attr_name, field in self._fields.items():
+                slot = _slot_name(attr_name)
+                if not isinstance(getattr(self, slot, None),
+                                  types.MemberDescriptorType):
+                    raise InvalidShield('%s has no slot for field %s'
+                                        % (self.__name__, attr_name))
+                self._data_slots[field.field_name] = slot
+
+        for field in self._fields.values():
+            _jsonschema_table(field.__class__)
+
+        self._python_plan = _serialization_plan(self, 'for_python')
+        self._json_plan = _serialization_plan(self, 'for_json')
+        self._json_encode_plan = _serialization_plan(self, 'for_json',
+                                                     native=True)
+        if self._meta.get('allow_inheritance', True) == False:
+            self._types = None
+        else:
+            self._types = tuple(self._superclasses.keys() +
+                                [self._class_name])
+
+        # Documents with permission layers, see `SafeableMixin`
+        if hasattr(self, '_get_internal_fields'):
+            self._internal_field_set = frozenset(self._internal_fields)
+            self._private_field_set = frozenset(getattr(self, '_private_fields',
+                                                        ()))
+            if self._public_fields is None:
+                self._public_field_set = None
+            else:
+                self._public_field_set = frozenset(self._public_fields)
+            self._hidden_field_set = self._internal_field_set | \
+                                     self._private_field_set
+
+            self._projection_keys = _projection_keys(self)
+            self._projection_plans = {}
+            for projection in self._projection_keys:
+                for encode in (False, True):
+                    self._projection_plans[projection, encode] = \
+                        _serialization_plan(self, 'for_json', native=encode,
+                                            projection=projection)
+            # Plans serializing several projections at once, made on demand
+            self._multi_projection_plans = {}
+
+        # Input keys each field is set from, for documents made by `wrap`
+        input_keys = {}
+        for attr_name, field in self._fields.items():
+            input_keys.setdefault(field, []).append(attr_name)
+        id_field = getattr(self, 'id', None)
+        if isinstance(id_field, BaseField):
+            keys = input_keys.setdefault(id_field, [])
+            keys.extend(key for key in ('id', '_id') if key not in keys)
+        self._input_keys = dict((field, tuple(keys))
+                                for field, keys in input_keys.items())
+        self._input_key_set = frozenset(key for keys in input_keys.values()
+                                        for key in keys)
+        # Fields with their own `__get__` are set as soon as `wrap` is called,
+        # and so are fields that fill in empty values, so copies of a document
+        # made before they're read don't fill them in differently
+        self._eager_fields = tuple(field for field in input_keys
+                                   if _overrides(field, '__get__') or
+                                      field._fills_empty)
+
+        # Fields validated again even if they weren't set since the last
+        # validation, as their values can change without being set or be
+        # set without `_store` noting it
+        self._revalidated_fields = tuple(
+            (attr_name, field) for attr_name, field in self._fields.items()
+            if field._mutable or _overrides(field, '__get__') or
+               not _uses_store(field))
+        # Key in `_data`, as recorded by `_store` => (attribute name, field)
+        self._fields_by_key = dict(
+            (field.field_name, (attr_name, field))
+            for attr_name, field in self._fields.items())
+        self._mutable_fields = tuple(
+            (attr_name, field) for attr_name, field in self._fields.items()
+            if field._mutable)
+        self._required_fields = tuple(
+            (attr_name, field) for attr_name, field in self._fields.items()
+            if field.required)
+
+        self._init_data = _compile_init_data(self)
+        self._validate_compiled = _compile_validate_compiled(self)
 
 
 class TopLevelDocumentMetaclass(DocumentMetaclass):
@@ -330,6 +1149,16 @@ class TopLevelDocumentMetaclass(DocumentMetaclass):
         meta.update(attrs.get('meta', {}))
         attrs['_meta'] = meta
 
+        # Slots can't be added after the class is created, so reserve one
+        # for the default id field now
+        slots = meta.get('slots', False) or \
+                any(getattr(base, '_meta', {}).get('slots') for base in bases)
+        has_id_field = any(isinstance(v, BaseField) and v.id_field
+                           for v in attrs.values())
+        if slots and not id_field and not has_id_field:
+            attrs['__slots__'] = tuple(attrs.get('__slots__', ())) + \
+                                 (_slot_name('id'),)
+
         # Set up collection manager, needs the class to have fields so use
         # DocumentMetaclass before instantiating CollectionManager object
         new_class = super_new(cls, name, bases, attrs)
@@ -350,6 +1179,7 @@ class TopLevelDocumentMetaclass(DocumentMetaclass):
             new_class._fields['id'] = UUIDField(uniq_field='_id')
             new_class.id = new_class._fields['id']
 
+        new_class._compile_class()
         return new_class
 
 class BaseDocumentManager(object):
@@ -0,0 +1,324 @@
+"""This module stores batches of documents column by column instead of as one
+object per document. Each field of the document class becomes a column.
+`IntField`, `LongField`, `FloatField` and `BooleanField` columns are packed
+into `array.array`s and every other field gets a list.
+
+Using it looks a bit like this:
+
+    batch = Movie.to_columns(movies)
+
+    # A column is just an array
+    average_year = sum(batch.column('year')) / len(batch)
+
+    # Rows behave like documents
+    print batch[0].title, batch[0]['year']
+
+    # Validation runs as a tight loop per column
+    errors = batch.validate(validate_all=True)
+"""
+
+import array
+
+from dictshield.base import ShieldException
+from dictshield.fields import (IntField,
+                               LongField,
+                               FloatField,
+                               BooleanField,
+                               NumberField,
+                               StringField)
+
+
+# Field class => array typecode. Checked in order, so subclasses come first.
+array_typecodes = [
+    (BooleanField, 'b'),
+    (LongField, 'l'),
+    (IntField, 'l'),
+    (FloatField, 'd'),
+]
+
+
+def _typecode(field):
+    for field_class, typecode in array_typecodes:
+        if isinstance(field, field_class):
+            return typecode
+    return None
+
+
+def _check_bool(value):
+    """Stands in for `BooleanField.for_python`, which would turn anything into
+    a bool, so non-bools end up in a list column and fail validation.
+    """
+    if not isinstance(value, bool):
+        raise TypeError('Not a boolean')
+    return value
+
+
+class DocumentBatch(object):
+    """A batch of documents of `document_class` stored as one column per
+    field. Documents or dictionaries of field values can be appended.
+
+    Array columns can't hold None, so each of them has a presence mask next
+    to it. A value that doesn't fit its array, like a long too large for a C
+    long, turns the column into a list.
+    """
+
+    def __init__(self, document_class, docs=()):
+        self.document_class = document_class
+        self._fields = document_class._fields
+        self._columns = {}
+        self._present = {}
+        self._converters = {}
+        self._length = 0
+
+        for name, field in self._fields.items():
+            typecode = _typecode(field)
+            if typecode is None:
+                self._columns[name] = list()
+            else:
+                self._columns[name] = array.array(typecode)
+                self._present[name] = bytearray()
+                if typecode == 'b':
+                    self._converters[name] = _check_bool
+                else:
+                    self._converters[name] = field.for_python
+
+        for doc in docs:
+            self.append(doc)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(index)
+        return DocumentRow(self, index)
+
+    def __iter__(self):
+        for index in xrange(self._length):
+            yield DocumentRow(self, index)
+
+    def column(self, name):
+        """Returns the column for the field `name`. Array columns hold a 0
+        where a value is missing, see `present`.
+        """
+        return self._columns[name]
+
+    def present(self, name):
+        """Returns the presence mask of the field `name`, or None for list
+        columns, which store missing values as None.
+        """
+        return self._present.get(name)
+
+    def append(self, doc):
+        """Appends a document, or a dictionary keyed by field name, to the
+        batch.
+        """
+        is_dict = isinstance(doc, dict)
+        for name, field in self._fields.items():
+            if is_dict:
+                value = doc.get(name)
+                if value is None and name == 'id':
+                    value = doc.get('_id')
+            else:
+                value = getattr(doc, name, None)
+
+            column = self._columns[name]
+            if name not in self._present:
+                column.append(value)
+                continue
+
+            present = self._present[name]
+            if value is None or value == '':
+                column.append(0)
+                present.append(0)
+                continue
+
+            try:
+                column.append(self._converters[name](value))
+            except (TypeError, ValueError, OverflowError):
+                self._to_list(name)
+                self._columns[name].append(value)
+            else:
+                present.append(1)
+        self._length += 1
+
+    def _to_list(self, name):
+        """Turns the array column `name` into a list column.
+        """
+        column = self._columns[name]
+        present = self._present.pop(name)
+        del self._converters[name]
+        self._columns[name] = [value if present[i] else None
+                               for i, value in enumerate(column)]
+
+    def _value(self, name, index):
+        present = self._present.get(name)
+        if present is None:
+            return self._columns[name][index]
+        if not present[index]:
+            return None
+        if self._converters[name] is _check_bool:
+            return bool(self._columns[name][index])
+        return self._columns[name][index]
+
+    ###
+    ### Validation
+    ###
+
+    def validate(self, validate_all=False):
+        """Validates the batch one column at a time, using the constraints of
+        each field.
+
+        Returns a compact error index like `validate_many`: a dictionary
+        mapping the index of each row that failed to the list of exceptions
+        found for it. Without `validate_all` only the first exception found
+        for a row is kept.
+        """
+        errors = {}
+
+        def add_error(index, exception):
+            if index in errors:
+                if validate_all:
+                    errors[index].append(exception)
+            else:
+                errors[index] = [exception]
+
+        for name, field in self._fields.items():
+            column = self._columns[name]
+            present = self._present.get(name)
+            field_name = field.field_name
+
+            # Required fields and the rows that have a value to validate
+            rows = []
+            for index in xrange(self._length):
+                if present is not None:
+                    has_value = present[index]
+                else:
+                    value = column[index]
+                    has_value = value is not None and value != ''
+                if has_value:
+                    rows.append(index)
+                elif field.required:
+                    add_error(index, ShieldException(
+                        'Required field missing', field_name, None))
+
+            if not rows:
+                continue
+
+            if field.choices is not None or field.validation is not None:
+                self._validate_rows(field, column, rows, add_error)
+            elif present is not None and isinstance(field, NumberField):
+                self._validate_range(field, column, rows, add_error)
+            elif present is not None:
+                continue
+            elif type(field) is StringField:
+                self._validate_strings(field, column, rows, add_error)
+            else:
+                self._validate_rows(field, column, rows, add_error)
+
+        return errors
+
+    def _validate_range(self, field, column, rows, add_error):
+        """Checks an array column against min_value and max_value.
+        """
+        min_value, max_value = field.min_value, field.max_value
+        if min_value is not None:
+            message = '%s value below min_value: %s' % (field.number_type,
+                                                         min_value)
+            for index in rows:
+                if column[index] < min_value:
+                    add_error(index, ShieldException(
+                        message, field.field_name, column[index]))
+        if max_value is not None:
+            message = '%s value above max_value: %s' % (field.number_type,
+                                                         max_value)
+            for index in rows:
+                if column[index] > max_value:
+                    add_error(index, ShieldException(
+                        message, field.field_name, column[index]))
+
+    def _validate_strings(self, field, column, rows, add_error):
+        """Checks a list column of a `StringField` against its type,
+        max_length, min_length and regex.
+        """
+        max_length, min_length = field.max_length, field.min_length
+        match = field.regex.match if field.regex is not None else None
+        for index in rows:
+            value = column[index]
+            if not isinstance(value, (str, unicode)):
+                add_error(index, ShieldException('Invalid value',
+                                                 field.field_name, value))
+            elif max_length is not None and len(value) > max_length:
+                add_error(index, ShieldException('String value is too long',
+                                                 field.field_name, value))
+            elif min_length is not None and len(value) < min_length:
+                add_error(index, ShieldException('String value is too short',
+                                                 field.uniq_field, value))
+            elif match is not None and match(value) is None:
+                add_error(index, ShieldException(
+                    'String value did not match validation regex',
+                    field.uniq_field, value))
+
+    def _validate_rows(self, field, column, rows, add_error):
+        """Validates each value in a column the way `BaseDocument.validate`
+        does.
+        """
+        for index in rows:
+            value = column[index]
+            try:
+                field._validate(value)
+            except ShieldException, se:
+                add_error(index, se)
+            except (ValueError, AttributeError, AssertionError):
+                add_error(index, ShieldException('Invalid value',
+                                                 field.field_name, value))
+
+
+class DocumentRow(object):
+    """A lazy view of one row of a `DocumentBatch` that behaves like a
+    document. Field values are read from the columns on access and nothing
+    is copied until `to_document` is called.
+    """
+    __slots__ = ('_batch', '_index')
+
+    def __init__(self, batch, index):
+        self._batch = batch
+        self._index = index
+
+    def __getattr__(self, name):
+        if name in self._batch._fields:
+            return self._batch._value(name, self._index)
+        raise AttributeError(name)
+
+    def __getitem__(self, name):
+        if name in self._batch._fields:
+            return self._batch._value(name, self._index)
+        raise KeyError(name)
+
+    def __iter__(self):
+        return iter(self._batch._fields)
+
+    def __contains__(self, name):
+        return name in self._batch._fields and \
+               self._batch._value(name, self._index) is not None
+
+    def __len__(self):
+        return len([name for name in self if name in self])
+
+    def __repr__(self):
+        return '<%s row %d>' % (self._batch.document_class.__name__,
+                                self._index)
+
+    def to_document(self):
+        """Builds a document of the batch's document class from the row.
+        """
+        values = dict((name, self[name]) for name in self)
+        return self._batch.document_class(**values)
+
+    def to_python(self):
+        return self.to_document().to_python()
+
+    def to_json(self, encode=True):
+        return self.to_document().to_json(encode=encode)
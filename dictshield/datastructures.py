@@ -1,4 +1,5 @@
 import copy
+import threading
 
 
 class MultiValueDictKeyError(KeyError):
@@ -185,3 +186,100 @@ class MultiValueDict(dict):
         Returns current object as a dict with singular values.
         """
         return dict((key, self[key]) for key in self)
+
+
+class LRUCache(object):
+    """
+    A dictionary-like cache of up to `maxsize` items. Once it's full, adding
+    an item drops the one least recently read or added. `get` counts its
+    hits and misses, so the size can be tuned.
+
+    >>> cache = LRUCache(2)
+    >>> cache['a'] = 1
+    >>> cache['b'] = 2
+    >>> cache.get('a')
+    1
+    >>> cache['c'] = 3
+    >>> cache.get('b', 'dropped')
+    'dropped'
+    >>> cache.hits, cache.misses
+    (1, 1)
+
+    Items are kept in a circular doubly linked list of
+    `[previous, next, key, value]` links, oldest first after the root.
+    """
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError('maxsize must be at least 1')
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.clear()
+
+    def __reduce__(self):
+        # Copies start out empty
+        return (self.__class__, (self.maxsize,))
+
+    def __repr__(self):
+        return '<%s: %d of %d, %d hits, %d misses>' % (
+            self.__class__.__name__, len(self), self.maxsize, self.hits,
+            self.misses)
+
+    def __len__(self):
+        return len(self._links)
+
+    def __contains__(self, key):
+        return key in self._links
+
+    def get(self, key, default=None):
+        with self._lock:
+            link = self._links.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+            self._move_to_end(link)
+            self.hits += 1
+            return link[3]
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            link = self._links.get(key)
+            if link is not None:
+                link[3] = value
+                self._move_to_end(link)
+                return
+            root = self._root
+            if len(self._links) >= self.maxsize:
+                oldest = root[1]
+                oldest[0][1] = oldest[1]
+                oldest[1][0] = oldest[0]
+                del self._links[oldest[2]]
+            last = root[0]
+            link = [last, root, key, value]
+            last[1] = root[0] = self._links[key] = link
+
+    def __delitem__(self, key):
+        with self._lock:
+            link = self._links.pop(key)
+            link[0][1] = link[1]
+            link[1][0] = link[0]
+
+    def _move_to_end(self, link):
+        previous, next, key, value = link
+        previous[1] = next
+        next[0] = previous
+        root = self._root
+        last = root[0]
+        last[1] = root[0] = link
+        link[0] = last
+        link[1] = root
+
+    def clear(self):
+        """Drops every item. The hit and miss counts are kept.
+        """
+        root = []
+        root[:] = [root, root, None, None]
+        with self._lock:
+            self._root = root
+            self._links = {}
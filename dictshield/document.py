@@ -3,7 +3,13 @@ from base import (ShieldException,
                   TopLevelDocumentMetaclass,
                   QueryableTopLevelDocumentMetaclass)
 
-from base import json
+from base import (json, get_json_backend, _jsonschema_cache, _overrides,
+                  _set_unknown, _instance_slots, _url_fields_cache,
+                  _DESCRIPTOR)
+
+import copy
+
+from columns import DocumentBatch
 
 __all__ = ['BaseDocument', 'Document', 'EmbeddedDocument', 'ShieldException']
 
@@ -15,6 +21,7 @@ from fields import (StringField,
                     BooleanField,
                     DateTimeField,
                     ListField,
+                    SortedListField,
                     EmbeddedDocumentField,
                     DictFieldNotFound)
                     
@@ -48,15 +55,151 @@ dictshield_fields = {
 ### Document structures
 ###
 
+def _verifies_urls(field, seen):
+    if isinstance(field, URLField):
+        return field.verify_exists
+    if isinstance(field, ListField):
+        return _verifies_urls(field.field, seen)
+    if isinstance(field, EmbeddedDocumentField):
+        return bool(_url_fields(field.document_type, seen))
+    return False
+
+def _url_fields(cls, seen=()):
+    """Returns the `(name, field)` pairs of the fields of `cls` that verify
+    URLs, directly or through lists and embedded documents.
+    """
+    fields = _url_fields_cache.get(cls)
+    if fields is None:
+        if cls in seen:
+            # Embedded in itself. Its URLs are still checked one at a time.
+            return ()
+        seen += (cls,)
+        fields = tuple((name, field) for name, field in cls._fields.items()
+                       if _verifies_urls(field, seen))
+        _url_fields_cache[cls] = fields
+    return fields
+
+def _collect_field_urls(field, value, urls):
+    """Adds the URLs `field` verifies in `value` to `urls`, a dictionary
+    mapping each `URLChecker` to a set of URLs.
+    """
+    if value is None:
+        return
+    if isinstance(field, URLField):
+        if isinstance(value, basestring):
+            urls.setdefault(field._url_checker(), set()).add(value)
+    elif isinstance(field, ListField):
+        for item in value:
+            _collect_field_urls(field.field, item, urls)
+    elif isinstance(value, BaseDocument):
+        value._collect_urls(urls, value._dirty_fields)
+
+def _validate_value(field, value):
+    """Validates the value of one field the way `BaseDocument.validate` does.
+    """
+    if value is not None and value != '': # treat empty strings is nonexistent
+        try:
+            field._validate(value)
+        except (ValueError, AttributeError, AssertionError):
+            raise ShieldException('Invalid value', field.field_name, value)
+    elif field.required:
+        raise ShieldException('Required field missing', field.field_name,
+                              value)
+
 class BaseDocument(object):
 
+    # Documents get a __dict__ unless they ask for slots in their meta
+    __slots__ = ()
+
+    # The input of a document made by `wrap` until all its fields are set
+    _raw = None
+
+    # Names of the fields set since the document was last validated, or
+    # None until it has been validated once
+    _dirty_fields = None
+
+    # Names of the fields set since `mark_clean` was last called, or None
+    # if it never was, and copies of values that can change in place
+    _changed_fields = None
+    _snapshots = None
+
     def __init__(self, **values):
+        self._init_data(values)
+
+    @classmethod
+    def wrap(cls, raw):
+        """Returns a document of `cls` for the dictionary `raw`, keyed like
+        the keyword arguments of the constructor, without setting any field
+        from it yet. Each field is set from `raw` the first time it's read,
+        as the constructor would have set it, and everything else is set
+        when the document is validated or serialized.
+
+        Fields that fill in empty values, like a `UUIDField` id, are set
+        right away, so a document stored without an id gets its new one
+        before it can be copied, and one stored with its id never makes one.
+
+        `raw` is kept until then, so it shouldn't be changed in the meantime.
+        Errors a field raises for a bad value come from the first read.
+        """
+        doc = cls.__new__(cls)
+        if cls._meta.get('slots', False):
+            for name in _instance_slots:
+                setattr(doc, name, None)
+        else:
+            doc._data = {}
+        doc._raw = raw
+
+        for name, value in raw.iteritems():
+            if name not in cls._input_key_set:
+                _set_unknown(doc, name, value)
+        for field in cls._eager_fields:
+            doc._hydrate_field(field)
+        return doc
+
+    def _hydrate_field(self, field):
+        """Sets `field` from the input of a document made by `wrap`, or to
+        its default if the input doesn't have it, and returns its value.
+        """
+        raw = self._raw
+        found = False
+        for key in self._input_keys[field]:
+            if key in raw:
+                field.__set__(self, raw[key])
+                found = True
+        if not found:
+            value = field.default
+            if callable(value):
+                value = value()
+            field.__set__(self, value)
+        return self._data.get(field.field_name)
+
+    def _hydrate(self):
+        """Sets every field of a document made by `wrap` that hasn't been
+        read yet, after which the input is no longer needed.
+        """
+        data = self._data
+        for field in self._input_keys:
+            if field.field_name not in data:
+                self._hydrate_field(field)
+        self._raw = None
+
+    def _init_data(self, values):
+        """Assigns default values and then the given values to the document.
+
+        `DocumentMetaclass` replaces this with a version compiled for each
+        document class. This implementation remains as the reference for the
+        compiled one.
+        """
         self._data = {}
 
         # Assign default values to instance
         for attr_name, attr_value in self._fields.items():
             # Use default value if present
             value = getattr(self, attr_name, None)
+            if value is None and attr_value._fills_empty:
+                # Filled in below if no value is given
+                self._data[attr_value.field_name] = None
+                continue
             setattr(self, attr_name, value)
 
         # Assign initial values to instance
@@ -69,25 +212,95 @@ class BaseDocument(object):
             except AttributeError:
                 pass
 
-    def validate(self):
+        for attr_name, attr_value in self._fields.items():
+            if attr_value._fills_empty and getattr(self, attr_name) is None:
+                setattr(self, attr_name, None)
+
+    def validate(self, full=False):
         """Ensure that all fields' values are valid and that required fields
         are present.
+
+        Setting `compiled_validation` to True in a document's `meta` uses the
+        validator `DocumentMetaclass` compiles for the class instead.
+
+        Once a document has been validated, validating it again only checks
+        the fields set since, fields like lists and embedded documents whose
+        values can change without being set, fields set without
+        `BaseField._store`, and that required fields are present. Embedded
+        documents do the same for their own fields. `full` validates every
+        field regardless, including those of embedded documents.
         """
-        # Get a list of tuples of field names and their current values
-        fields = [(field, getattr(self, name)) 
-                  for name, field in self._fields.items()]
+        if self._raw is not None:
+            self._hydrate()
+
+        if full:
+            self._forget_validation()
+        dirty = self._dirty_fields
+        if _url_fields(type(self)):
+            self._check_urls(None if full else dirty)
+
+        if not full and dirty is not None:
+            self._validate_changes(dirty)
+        elif self._meta.get('compiled_validation', False):
+            self._validate_compiled()
+        else:
+            # Get a list of tuples of field names and their current values
+            fields = [(field, getattr(self, name))
+                      for name, field in self._fields.items()]
 
-        # Ensure that each field is matched to a valid value
-        for field, value in fields:
-            if value is not None and value != '': # treat empty strings is nonexistent
-                try:
-                    field._validate(value)
-                except (ValueError, AttributeError, AssertionError):
-                    raise ShieldException('Invalid value', field.field_name,
-                                          value)
-            elif field.required:
-                raise ShieldException('Required field missing', field.field_name,
-                                      value)
+            # Ensure that each field is matched to a valid value
+            for field, value in fields:
+                _validate_value(field, value)
+
+        self._dirty_fields = set()
+
+    def _forget_validation(self):
+        """Makes the next validation of the document and of the documents
+        embedded in it a full one.
+        """
+        self._dirty_fields = None
+        for name, field in self._mutable_fields:
+            value = self._data.get(field.field_name)
+            if isinstance(value, BaseDocument):
+                value._forget_validation()
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, BaseDocument):
+                        item._forget_validation()
+
+    def _check_urls(self, dirty):
+        """Checks the URLs the fields about to be validated will verify in
+        one go, so their checkers have the answers cached. Only the fields in
+        `dirty` and the ones validated every time are looked at, unless it's
+        None.
+        """
+        urls = {}
+        self._collect_urls(urls, dirty)
+        for checker, checker_urls in urls.items():
+            checker.check_many(checker_urls)
+
+    def _collect_urls(self, urls, dirty):
+        for name, field in _url_fields(type(self)):
+            if dirty is None or name in dirty or field._mutable:
+                _collect_field_urls(field, getattr(self, name), urls)
+
+    def _validate_changes(self, dirty):
+        """Validates the fields in `dirty` and the ones `validate` checks
+        every time.
+        """
+        fields_by_key = self._fields_by_key
+        for key in dirty:
+            if key in fields_by_key:
+                name, field = fields_by_key[key]
+                _validate_value(field, getattr(self, name))
+        for name, field in self._revalidated_fields:
+            if name not in dirty:
+                _validate_value(field, getattr(self, name))
+        for name, field in self._required_fields:
+            value = getattr(self, name)
+            if value is None or value == '':
+                raise ShieldException('Required field missing',
+                                      field.field_name, value)
 
     @classmethod
     def _get_subclasses(cls):
@@ -133,6 +346,8 @@ class BaseDocument(object):
             return False
 
     def __len__(self):
+        if self._raw is not None:
+            self._hydrate()
         return len(self._data)
 
     def __repr__(self):
@@ -153,12 +368,27 @@ class BaseDocument(object):
     
     @classmethod
     def for_jsonschema(cls):
-        
+        """Returns the JSON Schema of the class. It is only generated the
+        first time, later calls get a copy.
+        """
+        return copy.deepcopy(cls._jsonschema())
+
+    @classmethod
+    def _jsonschema(cls):
+        """Returns the class's cached schema, which must not be modified.
+        """
+        schema = _jsonschema_cache.get(cls)
+        if schema is None:
+            schema = _jsonschema_cache[cls] = cls._generate_jsonschema()
+        return schema
+
+    @classmethod
+    def _generate_jsonschema(cls):
         # Place all fields in the schema unless public ones are specified.
-        if cls._public_fields is None:
+        if cls._public_field_set is None:
             field_names = cls._fields.keys()
         else:
-            field_names = cls._public_fields
+            field_names = cls._public_field_set
 
         properties = {}
 
@@ -172,8 +402,13 @@ class BaseDocument(object):
             }
 
     @classmethod
-    def to_jsonschema(cls):
-        return json.dumps(cls.for_jsonschema())
+    def to_jsonschema(cls, backend=None):
+        backend = get_json_backend(backend)
+        encoded = _jsonschema_cache.get((cls, backend))
+        if encoded is None:
+            encoded = backend.dumps(cls._jsonschema())
+            _jsonschema_cache[(cls, backend)] = encoded
+        return encoded
 
     # @classmethod
     # def for_jsonschema(cls):
@@ -219,25 +454,213 @@ class BaseDocument(object):
             
         return data
 
+    def _serialize(self, plan, meta_keys=('_cls', '_types')):
+        """Does what `_to_fields` does, following one of the serialization
+        plans the metaclass builds for each class. `_cls` and `_types` are
+        only added if they're in `meta_keys`.
+        """
+        if self._raw is not None:
+            self._hydrate()
+
+        data = {}
+        values = self._data
+
+        for uniq_field, key, converter, default in plan:
+            if default is _DESCRIPTOR:
+                value = getattr(self, key, None)
+            else:
+                value = values.get(key)
+                if value is None and default is not None:
+                    value = default() if callable(default) else default
+            if value is not None:
+                data[uniq_field] = converter(value)
+
+        if self._types is not None:
+            if '_cls' in meta_keys:
+                data['_cls'] = self._class_name
+            if '_types' in meta_keys:
+                data['_types'] = list(self._types)
+
+        if '_id' in data and not data['_id']:
+            del data['_id']
+
+        return data
+
+    def _serialize_projection(self, projection, encode=False):
+        """Serializes the fields `projection` keeps for JSON. Classes that
+        don't define `projection`, like embedded documents only some classes
+        define it for, fall back to 'owner'.
+        """
+        if projection not in self._projection_keys:
+            projection = 'owner'
+        return self._serialize(self._projection_plans[projection, encode],
+                               self._projection_keys[projection])
+
     def to_python(self):
         """Returns a Python dictionary representing the Document's metastructure
         and values.
         """
-        fun = lambda f, v: f.for_python(v)
-        data = self._to_fields(fun)
-        return data
+        return self._serialize(self._python_plan)
 
-    def to_json(self, encode=True):
+    def to_json(self, encode=True, backend=None, projection=None):
         """Return data prepared for JSON. By default, it returns a JSON encoded
         string, but disabling the encoding to prevent double encoding with
         embedded documents.
+
+        `backend` picks the JSON library to encode with, see
+        `dictshield.base.get_json_backend`.
+
+        `projection` may be 'owner' or 'public' to serialize only the fields
+        `make_ownersafe` or `make_publicsafe` would keep, without visiting
+        the others. Embedded documents use the projection of their own class.
         """
-        fun = lambda f, v: f.for_json(v)
-        data = self._to_fields(fun)
+        if projection is not None:
+            if projection not in getattr(self, '_projection_keys', ()):
+                raise ValueError('Unknown projection: %s' % projection)
+            data = self._serialize_projection(projection, encode)
+            if encode:
+                return get_json_backend(backend).dumps(data)
+            return data
+
         if encode:
-            return json.dumps(data)
+            data = self._serialize(self._json_encode_plan)
+            return get_json_backend(backend).dumps(data)
         else:
-            return data
+            return self._serialize(self._json_plan)
+
+    ###
+    ### Changes since the last write
+    ###
+
+    def mark_clean(self):
+        """Marks the document as written, so `to_python_delta` and
+        `to_json_delta` only return what changes after this. Embedded
+        documents are marked clean with it.
+        """
+        if self._raw is not None:
+            self._hydrate()
+
+        snapshots = {}
+        for name, field in self._mutable_fields:
+            value = self._data.get(field.field_name)
+            if isinstance(value, BaseDocument):
+                value.mark_clean()
+            elif isinstance(value, list):
+                snapshots[field.field_name] = list(value)
+                for item in value:
+                    if isinstance(item, BaseDocument):
+                        item.mark_clean()
+            elif value is not None:
+                snapshots[field.field_name] = copy.copy(value)
+
+        self._snapshots = snapshots
+        self._changed_fields = set()
+
+    def _delta(self, converter_name, prefix, delta):
+        """Adds the values that changed since `mark_clean` to `delta`, keyed
+        by their dotted path below `prefix`, converting them with each
+        field's `converter_name` method.
+        """
+        changed = self._changed_fields
+        snapshots = self._snapshots
+        fields_by_key = self._fields_by_key
+
+        for key in changed:
+            if key in fields_by_key:
+                name, field = fields_by_key[key]
+                value = getattr(self, name)
+                delta[prefix + field.uniq_field] = \
+                    None if value is None else \
+                    getattr(field, converter_name)(value)
+
+        # Values that may have changed in place
+        for name, field in self._mutable_fields:
+            if field.field_name in changed:
+                continue
+            key = prefix + field.uniq_field
+            value = getattr(self, name)
+            convert = getattr(field, converter_name)
+
+            if isinstance(value, BaseDocument):
+                value._delta_at(converter_name, key, delta, convert)
+            elif field.field_name not in snapshots:
+                continue
+            elif isinstance(field, ListField) and \
+                 not isinstance(field, SortedListField):
+                self._list_delta(field, converter_name, key, value,
+                                 snapshots[field.field_name], delta)
+            elif value != snapshots[field.field_name]:
+                delta[key] = None if value is None else convert(value)
+
+    def _delta_at(self, converter_name, key, delta, convert):
+        """Adds the changes of an embedded document stored at `key`, or all
+        of it if it was never marked clean.
+        """
+        changed = self._changed_fields
+        if changed is None:
+            delta[key] = convert(self)
+        elif changed or self._mutable_fields:
+            self._delta(converter_name, key + '.', delta)
+
+    @staticmethod
+    def _list_delta(field, converter_name, key, value, snapshot, delta):
+        """Adds the changes to a list as the paths of the items appended to
+        it and the changes of the embedded documents in it. A list that
+        lost or replaced items is added whole.
+        """
+        convert = getattr(field.field, converter_name)
+        length = len(snapshot)
+        if value is None or len(value) < length or \
+           any(old is not new and old != new
+               for old, new in zip(snapshot, value)):
+            delta[key] = getattr(field, converter_name)(value)
+            return
+
+        for index, item in enumerate(value):
+            if index >= length:
+                delta['%s.%d' % (key, index)] = convert(item)
+            elif isinstance(item, BaseDocument) and \
+                 (item._changed_fields or item._changed_fields is None or
+                  item._mutable_fields):
+                item._delta_at(converter_name, '%s.%d' % (key, index), delta,
+                               convert)
+
+    def to_python_delta(self):
+        """Returns the fields that changed since `mark_clean` was called like
+        `to_python` does, as a dictionary keyed by dotted paths. Changes to
+        embedded documents are keyed by the path to the changed field, like
+        'address.city', and items appended to a list by their index, like
+        'tags.3'. A field that was unset maps to None.
+
+        A document that was never marked clean returns all of `to_python`.
+        Changes inside values other than documents, like a dictionary in a
+        list, are only found when the field is set again.
+        """
+        if self._changed_fields is None:
+            return self.to_python()
+        delta = {}
+        self._delta('for_python', '', delta)
+        return delta
+
+    def to_json_delta(self, encode=True, backend=None):
+        """Returns the fields that changed since `mark_clean` was called, as
+        `to_python_delta` does, converted for JSON. `encode` and `backend`
+        work like they do for `to_json`.
+        """
+        if self._changed_fields is None:
+            return self.to_json(encode=encode, backend=backend)
+        delta = {}
+        self._delta('for_json', '', delta)
+        if encode:
+            return get_json_backend(backend).dumps(delta)
+        return delta
+
+    @classmethod
+    def to_columns(cls, docs):
+        """Returns a :class:`~dictshield.columns.DocumentBatch` holding `docs`,
+        documents or dictionaries of field values, column by column.
+        """
+        return DocumentBatch(cls, docs)
 
     def __eq__(self, other):
         if isinstance(other, self.__class__) and hasattr(other, 'id'):
@@ -301,7 +724,7 @@ class BaseDocument(object):
 
 
 
-class SafeableMixin:
+class SafeableMixin(object):
     """A `SafeableMixin` is used to add unix style permissions to fields in a
     `Document`. It creates this by using a black list and a white list in the
     form of three lists called `_internal_fields`, `_private_fields` and
@@ -318,23 +741,48 @@ class SafeableMixin:
 
     If `_public_fields` is defined, `make_json_publicsafe` can be used to create
     a structure made of only the fields in this list, making it our white list.
+
+    The metaclass turns the lists into frozensets once per class, available
+    as `_internal_field_set`, `_private_field_set`, `_public_field_set`
+    (None without `_public_fields`) and `_hidden_field_set`, the union of the
+    internal and private sets. Assigning one of the lists to the class later
+    rebuilds them.
+
+    More views of a document can be declared as named projections, each a
+    list of the fields it keeps:
+
+        _projections = {
+            'admin': ['name', 'email', 'is_active'],
+            'partner': ['name'],
+        }
+
+    `to_json(projection='partner')` serializes one of them, and `owner` and
+    `public` are always available. `project_many` serializes several in one
+    pass over the document. Embedded documents are serialized with their own
+    class's projection of the same name, or 'owner' if it has none.
     """
+    __slots__ = ()
+
     _internal_fields = [
         '_id', 'id', '_cls', '_types',
     ]
 
     _public_fields = None
 
+    # Named projection => the fields it keeps, see `project_many`
+    _projections = {}
+
+    _internal_field_set = frozenset(_internal_fields)
+    _private_field_set = frozenset()
+    _public_field_set = None
+    _hidden_field_set = _internal_field_set
+
     @classmethod
     def _get_internal_fields(cls):
         """Helper function that determines the union of :attr:`_internal_fields`
         and :attr:`_private_fields`, else returns just :attr:`_internal_fields`.
         """
-        internal_fields = set(cls._internal_fields)
-        if hasattr(cls, '_private_fields'):
-            private_fields = set(cls._private_fields)
-            internal_fields = internal_fields.union(private_fields)
-        return internal_fields
+        return cls._hidden_field_set
 
     @classmethod
     def _safe_data_from_input(cls, fun, data):
@@ -365,7 +813,100 @@ class SafeableMixin:
             return map(fun, data)
 
     @classmethod
-    def make_ownersafe(cls, doc_dict_or_dicts):
+    def _multi_projection_plan(cls, projections):
+        """Returns a plan serializing all of `projections`, a tuple of names,
+        at once. It has an entry `(uniq_field, key, converter, default,
+        names, field)` for each field some of the projections keep, where
+        `names` are those projections. `converter` is the field's `for_json`
+        if the field holds no documents and None otherwise. The second item
+        of the plan lists `(name, add _cls, add _types)` per projection.
+        """
+        plan = cls._multi_projection_plans.get(projections)
+        if plan is not None:
+            return plan
+
+        owner = cls._projection_keys['owner']
+        projection_keys = [(name, cls._projection_keys.get(name, owner))
+                           for name in projections]
+        entries = []
+        for attr_name, field in cls._fields.items():
+            names = tuple(name for name, keys in projection_keys
+                          if field.uniq_field in keys)
+            if not names:
+                continue
+            if field._projected_json(names[0]) == field.for_json:
+                converter = field.for_json
+            else:
+                converter = None
+            if _overrides(field, '__get__'):
+                entries.append((field.uniq_field, attr_name, converter,
+                                _DESCRIPTOR, names, field))
+            else:
+                entries.append((field.uniq_field, field.field_name, converter,
+                                field.default, names, field))
+        meta = [(name, '_cls' in keys, '_types' in keys)
+                for name, keys in projection_keys]
+
+        plan = cls._multi_projection_plans[projections] = (tuple(entries),
+                                                           tuple(meta))
+        return plan
+
+    def _serialize_projections(self, projections):
+        """Serializes the document for each of `projections` in one pass,
+        like `_serialize_projection` does for one, and returns a dictionary
+        mapping each projection to its result. Values are converted once and
+        shared by the projections that keep them.
+        """
+        if self._raw is not None:
+            self._hydrate()
+
+        entries, meta = self._multi_projection_plan(projections)
+        views = dict((projection, {}) for projection in projections)
+        values = self._data
+
+        for uniq_field, key, converter, default, names, field in entries:
+            if default is _DESCRIPTOR:
+                value = getattr(self, key, None)
+            else:
+                value = values.get(key)
+                if value is None and default is not None:
+                    value = default() if callable(default) else default
+            if value is None:
+                continue
+
+            if converter is not None:
+                value = converter(value)
+                if uniq_field == '_id' and not value:
+                    continue
+                for name in names:
+                    views[name][uniq_field] = value
+            else:
+                projected = field._projected_json_many(value, names)
+                for name in names:
+                    views[name][uniq_field] = projected[name]
+
+        if self._types is not None:
+            for name, add_cls, add_types in meta:
+                if add_cls:
+                    views[name]['_cls'] = self._class_name
+                if add_types:
+                    views[name]['_types'] = list(self._types)
+
+        return views
+
+    def project_many(self, projections):
+        """Serializes the document for JSON through each of `projections` in
+        a single pass, returning a dictionary that maps each projection name
+        to what `to_json(encode=False, projection=name)` would return.
+        """
+        projections = tuple(projections)
+        for projection in projections:
+            if projection not in self._projection_keys:
+                raise ValueError('Unknown projection: %s' % projection)
+        return self._serialize_projections(projections)
+
+    @classmethod
+    def make_ownersafe(cls, doc_dict_or_dicts, inplace=True):
         """This function removes internal fields and handles any steps
         required for making the data stucture (list, dict or Document)
         safe for transmission to the owner of the data.
@@ -375,35 +916,43 @@ class SafeableMixin:
 
         It attempts to handle multiple inputs types to avoid as many
         translation steps as possible.
+
+        Dictionaries passed in are trimmed in place. With `inplace` set to
+        False they are left alone and new dictionaries are returned, sharing
+        the values that are kept, which is cheaper than a deep copy.
         """
         internal_fields = cls._get_internal_fields()
 
         # This `handle_doc` implementation behaves as a blacklist
         containers = (list, dict)
         def handle_doc(doc_dict):
+            # Without inplace, kept values go in a new dictionary instead
+            safe_dict = doc_dict if inplace else {}
             for k,v in doc_dict.items():
                 if k in internal_fields:
-                    del doc_dict[k]
+                    if inplace:
+                        del doc_dict[k]
+                    continue
                 elif isinstance(v, EmbeddedDocument):
-                    doc_dict[k] = v.make_ownersafe(v.to_python())
+                    v = v.make_ownersafe(v.to_python())
                 elif isinstance(v, containers) and len(v) > 0:
                     if isinstance(v[0], EmbeddedDocument):
-                        doc_dict[k] = [doc.make_ownersafe(doc.to_python())
-                                       for doc in v]
-            return doc_dict
+                        v = [doc.make_ownersafe(doc.to_python()) for doc in v]
+                safe_dict[k] = v
+            return safe_dict
 
         trimmed = cls._safe_data_from_input(handle_doc, doc_dict_or_dicts)
         return trimmed
 
     @classmethod
-    def make_json_ownersafe(cls, doc_dict_or_dicts):
+    def make_json_ownersafe(cls, doc_dict_or_dicts, backend=None):
         """Trims the object using make_ownersafe and dumps to JSON
         """
-        trimmed = cls.make_ownersafe(doc_dict_or_dicts)
-        return json.dumps(trimmed)
+        trimmed = cls.make_ownersafe(doc_dict_or_dicts, inplace=False)
+        return get_json_backend(backend).dumps(trimmed)
 
     @classmethod
-    def make_publicsafe(cls, doc_dict_or_dicts):
+    def make_publicsafe(cls, doc_dict_or_dicts, inplace=True):
         """This funciton ensures found_data only contains the keys as
         listed in cls._public_fields.
 
@@ -413,33 +962,40 @@ class SafeableMixin:
         This function can be safely called without calling make_json_ownersafe
         first because it treats cls._public_fields as a whitelist and
         removes anything not listed.
+
+        `inplace` works like it does for `make_ownersafe`.
         """
-        if cls._public_fields is None:
-            return cls.make_ownersafe(doc_dict_or_dicts)
+        if cls._public_field_set is None:
+            return cls.make_ownersafe(doc_dict_or_dicts, inplace=inplace)
 
         # This `handle_doc` implementation behaves as a whitelist
+        public_fields = cls._public_field_set
         containers = (list, dict)
         def handle_doc(doc_dict):
+            # Without inplace, kept values go in a new dictionary instead
+            safe_dict = doc_dict if inplace else {}
             for k,v in doc_dict.items():
-                if k not in cls._public_fields:
-                    del doc_dict[k]
+                if k not in public_fields:
+                    if inplace:
+                        del doc_dict[k]
+                    continue
                 elif isinstance(v, EmbeddedDocument):
-                    doc_dict[k] = v.make_publicsafe(v.to_python())
+                    v = v.make_publicsafe(v.to_python())
                 elif isinstance(v, containers) and len(v) > 0:
                     if isinstance(v[0], EmbeddedDocument):
-                        doc_dict[k] = [doc.make_publicsafe(doc.to_python())
-                                       for doc in v]
-            return doc_dict
+                        v = [doc.make_publicsafe(doc.to_python()) for doc in v]
+                safe_dict[k] = v
+            return safe_dict
 
         trimmed = cls._safe_data_from_input(handle_doc, doc_dict_or_dicts)
         return trimmed
 
     @classmethod
-    def make_json_publicsafe(cls, doc_dict_or_dicts):
+    def make_json_publicsafe(cls, doc_dict_or_dicts, backend=None):
         """Trims the object using make_publicsafe and dumps to JSON
         """
-        trimmed = cls.make_publicsafe(doc_dict_or_dicts)
-        return json.dumps(trimmed)
+        trimmed = cls.make_publicsafe(doc_dict_or_dicts, inplace=False)
+        return get_json_backend(backend).dumps(trimmed)
 
     @classmethod
     def _gen_handle_exception(cls, validate_all, exception_list):
@@ -559,6 +1115,149 @@ class SafeableMixin:
         fun = lambda k,v: k in values
         return cls._validate_helper(fun, values, validate_all=validate_all)
 
+    @classmethod
+    def _gen_validate_values(cls, validate_all=False, delete_rogues=True):
+        """Generates a function that validates a dictionary of values like
+        `validate_class_fields` does, but returns the list of exceptions
+        found instead of raising them. A required field missing from the
+        values is reported as a `ShieldException`.
+
+        Everything that depends only on the class is computed here, once, so
+        the generated function can be called in a tight loop.
+        """
+        if not hasattr(cls, '_fields'):
+            raise ValueError('cls is not a Document instance')
+
+        internal_fields = cls._get_internal_fields()
+
+        # (key, field, is internal) for each field present in model
+        fields = list()
+        for k,v in cls._fields.items():
+            # handle common id name
+            if k == 'id': k = '_id'
+            fields.append((k, v, k in internal_fields))
+        class_fields = frozenset(k for k, v, internal in fields)
+
+        def validate_values(values):
+            exceptions = list()
+            for k, v, internal in fields:
+                if k in values:
+                    datum = values[k]
+                    # we don't accept internal fields from users
+                    if internal and datum is not v.default:
+                        exceptions.append(ShieldException(
+                            'Overwrite of internal fields attempted', k, v))
+                        if validate_all:
+                            continue
+                        return exceptions
+                elif v.required:
+                    exceptions.append(ShieldException(
+                        'Required field missing', k, None))
+                    if validate_all:
+                        continue
+                    return exceptions
+                else:
+                    continue
+
+                # skip None and treat empty strings as empty values
+                if datum is None:
+                    continue
+                if isinstance(datum, (str, unicode)) and len(datum.strip()) == 0:
+                    continue
+                try:
+                    v.validate(datum)
+                except ShieldException, e:
+                    exceptions.append(e)
+                    if not validate_all:
+                        return exceptions
+                except (ValueError, AttributeError, AssertionError):
+                    exceptions.append(ShieldException('Invalid value',
+                                                      v.field_name, datum))
+                    if not validate_all:
+                        return exceptions
+
+            # Remove rogue fields
+            if delete_rogues:
+                for rogue_field in [k for k in values if k not in class_fields]:
+                    del values[rogue_field]
+
+            return exceptions
+
+        return validate_values
+
+    @classmethod
+    def validate_many(cls, values_iterable, validate_all=False):
+        """Validates each dictionary in `values_iterable` with the semantics
+        of `validate_class_fields`, but without raising. Rogue fields are
+        removed from the dictionaries that pass, and with `validate_all`
+        from the ones that fail too.
+
+        Returns a compact error index: a dictionary mapping the position of
+        each dictionary that failed to the list of exceptions found for it.
+        Without `validate_all` that list holds only the first exception. An
+        empty dictionary means every record passed.
+        """
+        validate_values = cls._gen_validate_values(validate_all=validate_all)
+
+        errors = dict()
+        for i, values in enumerate(values_iterable):
+            exceptions = validate_values(values)
+            if exceptions:
+                errors[i] = exceptions
+        return errors
+
+    @classmethod
+    def iter_validate(cls, fileobj, validate_all=False, projection=None,
+                      backend=None):
+        """A generator that validates newline-delimited JSON read from
+        `fileobj` one line at a time, so memory use doesn't grow with the size
+        of the input. Blank lines are skipped.
+
+        Each line is validated with the semantics of `validate_class_fields`
+        and the generator yields `(line_no, result)`, with line numbers
+        starting at 1. `result` is the cleaned dictionary if the line passed
+        and the list of exceptions found otherwise.
+
+        `projection` may be 'owner' or 'public' to pass cleaned dictionaries
+        through `make_ownersafe` or `make_publicsafe` before yielding them.
+        `backend` picks the JSON library lines are decoded with.
+        """
+        projections = {
+            None: None,
+            'owner': cls.make_ownersafe,
+            'public': cls.make_publicsafe,
+        }
+        if projection not in projections:
+            raise ValueError('projection must be one of %s'
+                             % projections.keys())
+        project = projections[projection]
+
+        validate_values = cls._gen_validate_values(validate_all=validate_all)
+        loads = get_json_backend(backend).loads
+
+        for line_no, line in enumerate(fileobj, 1):
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                values = loads(line)
+            except ValueError:
+                yield line_no, [ShieldException('Invalid JSON', None, line)]
+                continue
+            if not isinstance(values, dict):
+                yield line_no, [ShieldException('Not a JSON object', None,
+                                                values)]
+                continue
+
+            exceptions = validate_values(values)
+            if exceptions:
+                yield line_no, exceptions
+            elif project is not None:
+                yield line_no, project(values)
+            else:
+                yield line_no, values
+
 
 class EmbeddedDocument(BaseDocument, SafeableMixin):
     """A :class:`~dictshield.Document` that isn't stored in its own
@@ -568,6 +1267,7 @@ class EmbeddedDocument(BaseDocument, SafeableMixin):
     """
 
     __metaclass__ = DocumentMetaclass
+    __slots__ = ()
 
 
 class Document(BaseDocument, SafeableMixin):
@@ -584,11 +1284,19 @@ class Document(BaseDocument, SafeableMixin):
     in the Document class hierarchy. To disable this behaviour and remove
     the dependence on the presence of `_cls` and `_types`, set
     :attr:`allow_inheritance` to ``False`` in the :attr:`meta` dictionary.
+
+    Setting :attr:`slots` to ``True`` in the :attr:`meta` dictionary stores
+    field values in ``__slots__`` instead of a ``_data`` dictionary, which
+    makes each document much smaller. Subclasses of such documents use slots
+    too and values assigned to attributes that aren't fields are dropped.
     """
 
     __metaclass__ = TopLevelDocumentMetaclass
+    __slots__ = ()
 
 
 class QueryableDocument(BaseDocument, SafeableMixin):
 
     __metaclass__ = QueryableTopLevelDocumentMetaclass
+    __slots__ = ()
+
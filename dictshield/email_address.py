@@ -0,0 +1,89 @@
+"""This module validates email addresses for `EmailField` in time linear in
+their length, with string methods instead of a backtracking regex.
+
+It accepts exactly the addresses `EmailField.EMAIL_REGEX` matches:
+
+    * a dot-atom local part, or a quoted one with backslash escapes,
+    * an '@',
+    * one or more domain labels of up to 63 letters, digits and inner
+      hyphens, each followed by a dot,
+    * a top-level domain of 2 to 6 letters, optionally followed by a dot.
+
+Letters are ASCII letters of either case. Like the regex's '$', a newline
+ending the address is ignored.
+
+Typical addresses are checked slightly slower than with the regex, but
+long hostile ones no longer take up to milliseconds.
+"""
+
+import string
+
+
+_LETTERS = string.ascii_letters
+
+# Characters of a dot-atom local part, besides the dots
+_ATEXT = "-!#$%&'*+/=?^_`{}|~" + string.digits + _LETTERS
+
+_DOT_ATOM_CHARS = _ATEXT + '.'
+
+# Characters of the labels before the top-level domain, with their dots
+_LABEL_CHARS = '-.' + string.digits + _LETTERS
+
+# Characters allowed unescaped between the quotes of a quoted local part,
+# and after a backslash
+_QTEXT = frozenset(chr(i) for i in range(1, 128)
+                   if chr(i) not in '\t\n\r "\\')
+_QUOTED_PAIR = frozenset(chr(i) for i in range(1, 128))
+
+
+def _is_quoted_string(local):
+    end = len(local) - 1
+    if end < 1 or local[0] != '"' or local[end] != '"':
+        return False
+    i = 1
+    while i < end:
+        char = local[i]
+        if char == '\\':
+            # An escape can't take the closing quote
+            if i + 1 >= end or local[i + 1] not in _QUOTED_PAIR:
+                return False
+            i += 2
+        elif char in _QTEXT:
+            i += 1
+        else:
+            return False
+    return True
+
+
+def is_email(value):
+    """Returns True if `value` is a valid email address.
+    """
+    if not isinstance(value, basestring):
+        return False
+    if value[-1:] == '\n':
+        value = value[:-1]
+
+    # Quoted local parts may hold an '@', but domains can't
+    local, at, domain = value.rpartition('@')
+    if not at:
+        return False
+
+    if domain[-1:] == '.':
+        domain = domain[:-1]
+    labels, dot, top_level = domain.rpartition('.')
+    if not labels or not 2 <= len(top_level) <= 6 or \
+       top_level.strip(_LETTERS) or labels.strip(_LABEL_CHARS):
+        return False
+    # Each label holds something and neither starts nor ends with a hyphen
+    if labels[0] in '.-' or labels[-1] in '.-' or '..' in labels or \
+       '.-' in labels or '-.' in labels:
+        return False
+    if len(labels) > 63 and \
+       max(len(label) for label in labels.split('.')) > 63:
+        return False
+
+    if local.strip(_DOT_ATOM_CHARS):
+        return _is_quoted_string(local)
+    # A dot-atom, which can't start or end with a dot or have two in a row
+    return bool(local) and local[0] != '.' and local[-1] != '.' and \
+           '..' not in local
@@ -0,0 +1,207 @@
+"""This module writes documents as JSON straight from their fields, without
+building the dictionary `to_json` returns first. Leaf values still go
+through each field's `for_json`, but embedded documents and lists of them
+are written as they're reached, so a long list of documents never exists as
+one big tree of dictionaries.
+
+Using it looks a bit like this:
+
+    from dictshield.encoder import dump, iterencode
+
+    # Write a document to a file object
+    dump(order, response)
+
+    # Stream a large list of documents in chunks
+    orders = (Order(**row) for row in cursor)
+    for chunk in iterencode({'orders': orders}):
+        response.write(chunk)
+
+The output decodes to the same value `to_json` returns. Lists, tuples,
+generators and dictionaries may hold documents at any depth.
+
+`fan_out` serializes the same documents for several audiences at once:
+
+    views = fan_out(orders, ['owner', 'public', 'admin'])
+    send(owner, views['owner'])
+"""
+
+import types
+
+from dictshield.base import json, get_json_backend, _DESCRIPTOR
+from dictshield.document import BaseDocument
+from dictshield.fields import EmbeddedDocumentField, ListField
+
+
+# Encodes leaf values like `json.dumps` with default arguments
+_encode = json.JSONEncoder().encode
+
+# How the value of a field is written
+_LEAF, _DOCUMENT, _LIST = range(3)
+
+# Field => one of the above, worked out the first time a field is written
+_field_kinds = {}
+
+
+def _field_kind(field):
+    kind = _field_kinds.get(field)
+    if kind is None:
+        for_json = type(field).for_json.im_func
+        if for_json is EmbeddedDocumentField.for_json.im_func:
+            kind = _DOCUMENT
+        elif for_json is ListField.for_json.im_func:
+            kind = _LIST
+        else:
+            kind = _LEAF
+        _field_kinds[field] = kind
+    return kind
+
+
+def _iterencode_field(field, value):
+    """Yields the JSON encoding of `field.for_json(value)` in chunks.
+    """
+    kind = _field_kind(field)
+    if kind == _DOCUMENT and isinstance(value, BaseDocument):
+        for chunk in _iterencode_document(value):
+            yield chunk
+    elif kind == _LIST and value is not None:
+        separator = '['
+        for item in value:
+            yield separator
+            for chunk in _iterencode_field(field.field, item):
+                yield chunk
+            separator = ', '
+        if separator == '[':
+            yield '['
+        yield ']'
+    else:
+        yield _encode(field.for_json(value))
+
+
+def _iterencode_document(doc):
+    """Yields the JSON encoding of `doc.to_json()` in chunks, following the
+    same serialization plan.
+    """
+    if doc._raw is not None:
+        doc._hydrate()
+
+    values = doc._data
+    separator = '{'
+
+    for uniq_field, key, converter, default in doc._json_plan:
+        if default is _DESCRIPTOR:
+            value = getattr(doc, key, None)
+        else:
+            value = values.get(key)
+            if value is None and default is not None:
+                value = default() if callable(default) else default
+        if value is None:
+            continue
+
+        if uniq_field == '_id':
+            # A false id is left out, so it has to be converted up front
+            value = converter(value)
+            if not value:
+                continue
+            yield '%s%s: %s' % (separator, _encode(uniq_field), _encode(value))
+        else:
+            yield '%s%s: ' % (separator, _encode(uniq_field))
+            for chunk in _iterencode_field(converter.im_self, value):
+                yield chunk
+        separator = ', '
+
+    if doc._types is not None:
+        yield '%s"_cls": %s, "_types": %s' % (separator,
+                                              _encode(doc._class_name),
+                                              _encode(list(doc._types)))
+    elif separator == '{':
+        yield '{'
+    yield '}'
+
+
+def _encode_key(key):
+    """Encodes a dictionary key as a JSON string, converting numbers, booleans
+    and None like `json.dumps` does.
+    """
+    if isinstance(key, basestring):
+        return _encode(key)
+    if isinstance(key, bool):
+        # The C encoder behind `json.dumps` writes these as 'True' and 'False'
+        return _encode(str(key))
+    if key is None or isinstance(key, (int, long, float)):
+        return _encode(_encode(key))
+    raise TypeError('key %r is not a string' % (key,))
+
+
+def iterencode(obj):
+    """Yields the JSON encoding of `obj` in chunks. `obj` may be a document,
+    or a list, tuple, generator or dictionary holding documents and any
+    other value `json.dumps` accepts.
+    """
+    if isinstance(obj, BaseDocument):
+        for chunk in _iterencode_document(obj):
+            yield chunk
+    elif isinstance(obj, dict):
+        separator = '{'
+        for key, value in obj.iteritems():
+            yield '%s%s: ' % (separator, _encode_key(key))
+            for chunk in iterencode(value):
+                yield chunk
+            separator = ', '
+        if separator == '{':
+            yield '{'
+        yield '}'
+    elif isinstance(obj, (list, tuple, types.GeneratorType)):
+        separator = '['
+        for item in obj:
+            yield separator
+            for chunk in iterencode(item):
+                yield chunk
+            separator = ', '
+        if separator == '[':
+            yield '['
+        yield ']'
+    else:
+        yield _encode(obj)
+
+
+def dump(obj, fileobj, buffer_size=8192):
+    """Writes the JSON encoding of `obj` to `fileobj`, a file-like object,
+    in writes of about `buffer_size` bytes.
+    """
+    buffered = []
+    size = 0
+    for chunk in iterencode(obj):
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            fileobj.write(''.join(buffered))
+            buffered = []
+            size = 0
+    if buffered:
+        fileobj.write(''.join(buffered))
+
+
+def fan_out(docs, projections, encode=True, backend=None):
+    """Serializes a document, or a list of documents, through each of
+    `projections` and returns a dictionary mapping each projection name to
+    its JSON. Every document is walked once for all the projections, with
+    converted values shared between them, see `SafeableMixin.project_many`.
+
+    Without `encode`, the dictionaries, or lists of them, are returned
+    instead of JSON strings. `backend` picks the JSON library.
+    """
+    projections = tuple(projections)
+    if isinstance(docs, BaseDocument):
+        views = docs.project_many(projections)
+    else:
+        views = dict((projection, []) for projection in projections)
+        for doc in docs:
+            doc_views = doc.project_many(projections)
+            for projection in projections:
+                views[projection].append(doc_views[projection])
+
+    if encode:
+        dumps = get_json_backend(backend).dumps
+        return dict((projection, dumps(view))
+                    for projection, view in views.iteritems())
+    return views
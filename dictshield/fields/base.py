@@ -1,12 +1,21 @@
 from dictshield.base import BaseField, UUIDField, ShieldException, InvalidShield
 from dictshield.datastructures import MultiValueDict
+from dictshield.email_address import is_email
+from dictshield.iso8601 import parse_datetime
+from dictshield import urlcheck
 
 
 from operator import itemgetter
+import functools
 import re
 import datetime
 import decimal
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 RECURSIVE_REFERENCE_CONSTANT = 'self'
 
 
@@ -45,9 +54,33 @@ class StringField(BaseField):
             raise ShieldException('String value is too short', self.uniq_field, value)
 
         if self.regex is not None and self.regex.match(value) is None:
-            message = 'String value did not match validation regex',
+            message = 'String value did not match validation regex'
             raise ShieldException(message, self.uniq_field, value)
 
+    def _validate_source(self, prefix, namespace):
+        if type(self).validate.im_func is not StringField.validate.im_func:
+            return super(StringField, self)._validate_source(prefix, namespace)
+
+        lines = ['assert isinstance(value, (str, unicode))']
+        if self.max_length is not None:
+            lines.extend([
+                'if len(value) > %r:' % self.max_length,
+                '    raise ShieldException(%r, %r, value)'
+                % ('String value is too long', self.field_name)])
+        if self.min_length is not None:
+            lines.extend([
+                'if len(value) < %r:' % self.min_length,
+                '    raise ShieldException(%r, %r, value)'
+                % ('String value is too short', self.uniq_field)])
+        if self.regex is not None:
+            namespace[prefix + 'match'] = self.regex.match
+            lines.extend([
+                'if %smatch(value) is None:' % prefix,
+                '    raise ShieldException(%r, %r, value)'
+                % ('String value did not match validation regex',
+                   self.uniq_field)])
+        return lines
+
     def lookup_member(self, member_name):
         return None
 
@@ -59,7 +92,8 @@ class URLField(StringField):
     """A field that validates input as an URL.
 
     If verify_exists=True is passed the validate function will make sure
-    the URL makes a valid connection.
+    the URL makes a valid connection, using `checker`, a
+    `dictshield.urlcheck.URLChecker`, or the default one.
     """
 
     URL_REGEX = re.compile(
@@ -71,10 +105,14 @@ class URLField(StringField):
         r'(?:/?|[/?]\S+)$', re.IGNORECASE
     )
 
-    def __init__(self, verify_exists=False, **kwargs):
+    def __init__(self, verify_exists=False, checker=None, **kwargs):
         self.verify_exists = verify_exists
+        self.checker = checker
         super(URLField, self).__init__(**kwargs)
 
+    def _url_checker(self):
+        return self.checker or urlcheck.default_checker
+
     def _jsonschema_format(self):
         return 'url'
 
@@ -82,14 +120,9 @@ class URLField(StringField):
         if not URLField.URL_REGEX.match(value):
             raise ShieldException('Invalid URL', self.field_name, value)
 
-        if self.verify_exists:
-            import urllib2
-            try:
-                request = urllib2.Request(value)
-                urllib2.urlopen(request)
-            except Exception:
-                message = 'URL does not exist'
-                raise ShieldException(message, self.field_name, value)
+        if self.verify_exists and not self._url_checker().exists(value):
+            message = 'URL does not exist'
+            raise ShieldException(message, self.field_name, value)
 
 
 class EmailField(StringField):
@@ -103,7 +136,8 @@ class EmailField(StringField):
     )
 
     def validate(self, value):
-        if not EmailField.EMAIL_REGEX.match(value):
+        # Accepts what EMAIL_REGEX matches, in linear time
+        if not is_email(value):
             raise ShieldException('Invalid email address', self.field_name,
                                   value)
 
@@ -149,7 +183,7 @@ class NumberField(JsonNumberMixin, BaseField):
     def validate(self, value):
         try:
             value = self.number_class(value)
-        except:
+        except Exception:
             raise ShieldException('Not %s' % self.number_type, self.field_name,
                                   value)
 
@@ -163,6 +197,32 @@ class NumberField(JsonNumberMixin, BaseField):
                                   % (self.number_type, self.max_value),
                                   self.field_name, value)
 
+    def _validate_source(self, prefix, namespace):
+        if type(self).validate.im_func is not NumberField.validate.im_func:
+            return super(NumberField, self)._validate_source(prefix, namespace)
+
+        namespace[prefix + 'number_class'] = self.number_class
+        lines = ['try:',
+                 '    number = %snumber_class(value)' % prefix,
+                 'except Exception:',
+                 '    raise ShieldException(%r, %r, value)'
+                 % ('Not %s' % self.number_type, self.field_name)]
+        if self.min_value is not None:
+            namespace[prefix + 'min_value'] = self.min_value
+            lines.extend([
+                'if number < %smin_value:' % prefix,
+                '    raise ShieldException(%r, %r, number)'
+                % ('%s value below min_value: %s'
+                   % (self.number_type, self.min_value), self.field_name)])
+        if self.max_value is not None:
+            namespace[prefix + 'max_value'] = self.max_value
+            lines.extend([
+                'if number > %smax_value:' % prefix,
+                '    raise ShieldException(%r, %r, number)'
+                % ('%s value above max_value: %s'
+                   % (self.number_type, self.max_value), self.field_name)])
+        return lines
+
 class IntField(NumberField):
     """A field that validates input as an Integer
     """
@@ -203,6 +263,9 @@ class DecimalField(BaseField, JsonNumberMixin):
             value = unicode(value)
         return decimal.Decimal(value)
 
+    # The JSON backends encode decimals like `for_json`
+    _json_native = True
+
     def for_json(self, value):
         return unicode(value)
 
@@ -304,6 +367,9 @@ class DateTimeField(BaseField):
     def _jsonschema_format(self):
         return 'date-time'
 
+    # `__set__` stores values through `_store`
+    _uses_store = True
+
     def __set__(self, instance, value):
         """If `value` is a string, the string should match iso8601 format.
         `iso8601_to_date` is called for conversion.
@@ -316,7 +382,7 @@ class DateTimeField(BaseField):
         if isinstance(value, (str, unicode)):
             value = DateTimeField.iso8601_to_date(value)
 
-        instance._data[self.field_name] = value
+        self._store(instance, value)
 
     @classmethod
     def iso8601_to_date(cls, datestring):
@@ -326,22 +392,14 @@ class DateTimeField(BaseField):
 
         Example: 'YYYY-MM-DDTHH:MM:SS.mmmmmm'
 
-        ISO8601's elements come in the same order as the inputs to creating
-        a datetime.datetime.  I pass the patterns directly into the datetime
-        constructor.
-
-        The ISO8601 spec is rather complex and allows for many variations in
-        formatting values.  Currently the format expected is strict, with the
-        only optional component being the six-digit microsecond field.
+        The time, seconds and fractional seconds are optional, and a UTC
+        offset like 'Z' or '+02:00' gives an aware datetime. See
+        `dictshield.iso8601` for the formats accepted. Raises a ValueError
+        for anything else.
 
         http://www.w3.org/TR/NOTE-datetime
         """
-        iso8601 = '(\d\d\d\d)-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d\d\d\d\d\d))?'
-        elements = re.findall(iso8601, datestring)
-        date_info = elements[0]
-        date_digits = [int(d) for d in date_info if d]
-        value = datetime.datetime(*date_digits)
-        return value
+        return parse_datetime(datestring)
 
     @classmethod
     def date_to_iso8601(cls, dt):
@@ -357,6 +415,9 @@ class DateTimeField(BaseField):
     def for_python(self, value):
         return value
 
+    # The JSON backends encode datetimes like `for_json`
+    _json_native = True
+
     def for_json(self, value):
         v = DateTimeField.date_to_iso8601(value)
         return v
@@ -367,6 +428,8 @@ class ListField(BaseField):
     of the field to be used as a list in the model.
     """
 
+    _mutable = True
+
     def __init__(self, field, **kwargs):
         if not isinstance(field, BaseField):
             raise InvalidShield('Argument to ListField constructor must be '
@@ -375,6 +438,9 @@ class ListField(BaseField):
         kwargs.setdefault('default', list)
         super(ListField, self).__init__(**kwargs)
 
+    # `__set__` stores values through `_store`
+    _uses_store = True
+
     def __set__(self, instance, value):
         """Descriptor for assigning a value to a field in a document.
         """
@@ -388,7 +454,7 @@ class ListField(BaseField):
                     doc = doc_obj
                 list_of_docs.append(doc)
             value = list_of_docs
-        instance._data[self.field_name] = value
+        self._store(instance, value)
 
     def _jsonschema_type(self):
         return 'array'
@@ -409,6 +475,22 @@ class ListField(BaseField):
             return list()
         return [self.field.for_json(item) for item in value]
 
+    def _projected_json(self, projection):
+        if type(self).for_json.im_func is not ListField.for_json.im_func:
+            return self.for_json
+        item_json = self.field._projected_json(projection)
+        if item_json == self.field.for_json:
+            return self.for_json
+        return lambda value: [item_json(item) for item in value]
+
+    def _projected_json_many(self, value, projections):
+        if self._projected_json(projections[0]) == self.for_json:
+            return dict.fromkeys(projections, self.for_json(value))
+        items = [self.field._projected_json_many(item, projections)
+                 for item in value]
+        return dict((projection, [item[projection] for item in items])
+                    for projection in projections)
+
     def validate(self, value):
         """Make sure that a list of valid fields is being used.
         """
@@ -416,11 +498,70 @@ class ListField(BaseField):
             error_msg = 'Only lists and tuples may be used in a list field'
             raise ShieldException(error_msg, self.field_name, value)
 
+        if len(value) >= self._vectorize_min_length:
+            kinds = self._numpy_kinds()
+            if kinds is not None and self._validate_numbers(value, kinds):
+                return
+
+        field = self.field
+        if field.validation_cache is None:
+            validate = field.validate
+        else:
+            validate = functools.partial(field._cached_check, field.validate)
+        for index, item in enumerate(value):
+            try:
+                validate(item)
+            except Exception:
+                self._invalid_item(value, index)
+
+    # Lists shorter than this aren't worth handing to NumPy
+    _vectorize_min_length = 16
+
+    def _invalid_item(self, value, index):
+        raise ShieldException('Invalid ListField item at index %d' % index,
+                              self.field_name, str(value[index]))
+
+    def _numpy_kinds(self):
+        """Returns the NumPy dtype kinds an array of this field's items may
+        have to be validated in one go, or None if they must be validated one
+        at a time.
+        """
+        if numpy is None:
+            return None
+        field = self.field
+        if not isinstance(field, (IntField, FloatField)) or \
+           type(field).validate.im_func is not NumberField.validate.im_func:
+            return None
+        if isinstance(field, IntField):
+            return 'biu'
+        return 'biuf'
+
+    def _validate_numbers(self, value, kinds):
+        """Validates a list of numbers in one go by converting it to an array
+        and masking out of range items.
+
+        Returns False if the array isn't made of numbers of `kinds`, like
+        when the list holds None, strings or numbers too large for NumPy. The
+        caller then falls back to the loop, which converts each item the way
+        `NumberField.validate` does and finds the offending one.
+        """
         try:
-            [self.field.validate(item) for item in value]
-        except Exception:
-            raise ShieldException('Invalid ListField item', self.field_name,
-                                  str(item))
+            numbers = numpy.asarray(value)
+        except (TypeError, ValueError):
+            return False
+        if numbers.ndim != 1 or numbers.dtype.kind not in kinds:
+            return False
+
+        field = self.field
+        mask = None
+        if field.min_value is not None:
+            mask = numbers < field.min_value
+        if field.max_value is not None:
+            above = numbers > field.max_value
+            mask = above if mask is None else mask | above
+        if mask is not None and mask.any():
+            self._invalid_item(value, int(mask.argmax()))
+        return True
 
     def lookup_member(self, member_name):
         return self.field.lookup_member(member_name)
@@ -429,8 +570,8 @@ class ListField(BaseField):
         self.field.owner_document = owner_document
         self._owner_document = owner_document
 
-    def _get_owner_document(self, owner_document):
-        self._owner_document = owner_document
+    def _get_owner_document(self):
+        return self._owner_document
 
     owner_document = property(_get_owner_document, _set_owner_document)
 
@@ -458,6 +599,8 @@ class DictField(BaseField):
     similar to an embedded document, but the structure is not defined.
     """
 
+    _mutable = True
+
     def _jsonschema_type(self):
         return 'object'
 
@@ -492,6 +635,9 @@ class MultiValueDictField(DictField):
         kwargs.setdefault('default', lambda: MultiValueDict())
         super(MultiValueDictField, self).__init__(*args, **kwargs)
 
+    # `__set__` stores values through `_store`
+    _uses_store = True
+
     def __set__(self, instance, value):
         if value is not None and not isinstance(value, MultiValueDict):
             value = MultiValueDict(value)
@@ -521,6 +667,8 @@ class GeoPointField(BaseField):
     """A list storing a latitude and longitude.
     """
 
+    _mutable = True
+
     def _jsonschema_type(self):
         return 'array'
     
@@ -565,6 +713,9 @@ class EmbeddedDocumentField(BaseField):
     :class:`~dictshield.EmbeddedDocument`.
     """
 
+    # Embedded documents keep track of their own changes, see `validate`
+    _mutable = True
+
     def __init__(self, document_type, **kwargs):
         # BADBADBAD
         print ' you are running bad code:: this import statement should not be here! '
@@ -577,12 +728,15 @@ class EmbeddedDocumentField(BaseField):
         self.document_type_obj = document_type
         super(EmbeddedDocumentField, self).__init__(**kwargs)
 
+    # `__set__` stores values through `_store`
+    _uses_store = True
+
     def __set__(self, instance, value):
         if value is None:
             return
         if not isinstance(value, self.document_type):
             value = self.document_type(**value)
-        instance._data[self.field_name] = value
+        self._store(instance, value)
 
     @property
     def document_type(self):
@@ -606,6 +760,18 @@ class EmbeddedDocumentField(BaseField):
     def for_json(self, value):
         return value.to_json(encode=False)
 
+    def _projected_json(self, projection):
+        if type(self).for_json.im_func is not \
+           EmbeddedDocumentField.for_json.im_func:
+            return self.for_json
+        return lambda value: value._serialize_projection(projection)
+
+    def _projected_json_many(self, value, projections):
+        if type(self).for_json.im_func is not \
+           EmbeddedDocumentField.for_json.im_func:
+            return dict.fromkeys(projections, self.for_json(value))
+        return value._serialize_projections(projections)
+
     def validate(self, value):
         """Make sure that the document instance is an instance of the
         EmbeddedDocument subclass provided when the document was defined.
@@ -19,6 +19,9 @@ class TimeStampField(DateTimeField):
     instead of a ISO-8601 string.
     """
 
+    # `__set__` stores values through `_store`
+    _uses_store = True
+
     def __set__(self, instance, value):
         """Will try to parse the value as a timestamp.  If that fails it
         will fallback to DateTimeField's value parsing.
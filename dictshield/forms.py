@@ -97,9 +97,8 @@ class Form(object):
         # This behavior is desireable for letting users update fields that might
         # have privacy restraints for serializable forms.
         if private_fields:
-            internal_fields = set(model._internal_fields)
-            private_overrides = set(private_fields)
-            self._hidden_fields = internal_fields.union(private_overrides)
+            internal_fields = model._internal_field_set
+            self._hidden_fields = internal_fields.union(private_fields)
         else:
             self._hidden_fields = self._model._get_internal_fields()
             
@@ -0,0 +1,112 @@
+"""This module parses ISO 8601 date and time strings into datetimes for
+`DateTimeField`.
+
+The extended format is supported, with an optional time, optional seconds,
+fractional seconds of any width and an optional UTC offset:
+
+    2012-03-04
+    2012-03-04T05:06
+    2012-03-04T05:06:07
+    2012-03-04T05:06:07.25
+    2012-03-04T05:06:07.123456789Z
+    2012-03-04 05:06:07+02:00
+
+Strings with an offset become aware datetimes, with a `FixedOffset` as
+their tzinfo, and the others naive ones. Fractions beyond microseconds are
+truncated.
+
+Both patterns are compiled once. The common 'YYYY-MM-DDTHH:MM:SS' form,
+with or without six digits of microseconds, is matched by a simpler one
+first.
+"""
+
+import datetime
+import re
+
+
+class FixedOffset(datetime.tzinfo):
+    """A timezone `minutes` ahead of UTC, or behind it if negative.
+    """
+
+    def __init__(self, minutes):
+        self._minutes = minutes
+        self._offset = datetime.timedelta(minutes=minutes)
+        if minutes == 0:
+            self._name = 'UTC'
+        else:
+            sign = '-' if minutes < 0 else '+'
+            self._name = '%s%02d:%02d' % ((sign,) + divmod(abs(minutes), 60))
+
+    def __reduce__(self):
+        return (fixed_offset, (self._minutes,))
+
+    def __repr__(self):
+        return '<FixedOffset %s>' % self._name
+
+    def utcoffset(self, dt):
+        return self._offset
+
+    def dst(self, dt):
+        return datetime.timedelta(0)
+
+    def tzname(self, dt):
+        return self._name
+
+
+# Minutes => FixedOffset, so datetimes with the same offset share one
+_offsets = {}
+
+def fixed_offset(minutes):
+    """Returns the `FixedOffset` for `minutes` ahead of UTC.
+    """
+    tz = _offsets.get(minutes)
+    if tz is None:
+        tz = _offsets[minutes] = FixedOffset(minutes)
+    return tz
+
+UTC = fixed_offset(0)
+
+
+# The common 'YYYY-MM-DDTHH:MM:SS' form, with or without microseconds
+_COMMON = re.compile(r'(\d{4})-(\d\d)-(\d\d)T(\d\d):(\d\d):(\d\d)(?:\.(\d{6}))?\Z')
+
+_ISO8601 = re.compile(r'(\d{4})-(\d\d)-(\d\d)'
+                      r'(?:[Tt ](\d\d):(\d\d)(?::(\d\d)(?:[.,](\d+))?)?'
+                      r'(?:([Zz])|([+-])(\d\d)(?::?(\d\d))?)?)?\Z')
+
+
+def parse_datetime(datestring):
+    """Returns the datetime for the ISO 8601 string `datestring`, raising a
+    ValueError if it isn't one.
+    """
+    match = _COMMON.match(datestring)
+    if match is not None:
+        year, month, day, hour, minute, second, microsecond = match.groups()
+        return datetime.datetime(int(year), int(month), int(day), int(hour),
+                                 int(minute), int(second),
+                                 int(microsecond) if microsecond else 0)
+
+    match = _ISO8601.match(datestring)
+    if match is None:
+        raise ValueError('Not an ISO 8601 datetime: %r' % (datestring,))
+    (year, month, day, hour, minute, second, fraction,
+     zulu, sign, offset_hours, offset_minutes) = match.groups()
+
+    if fraction:
+        microsecond = int(fraction[:6].ljust(6, '0'))
+    else:
+        microsecond = 0
+
+    if zulu:
+        tzinfo = UTC
+    elif sign:
+        minutes = int(offset_hours) * 60 + int(offset_minutes or 0)
+        if minutes >= 24 * 60:
+            raise ValueError('UTC offset out of range: %r' % (datestring,))
+        tzinfo = fixed_offset(-minutes if sign == '-' else minutes)
+    else:
+        tzinfo = None
+
+    return datetime.datetime(int(year), int(month), int(day), int(hour or 0),
+                             int(minute or 0), int(second or 0), microsecond,
+                             tzinfo)
@@ -0,0 +1,82 @@
+"""This module spreads validation of large batches of dictionaries across a
+pool of processes. Validation is pure Python and CPU bound, so a single
+process can only go as fast as one core.
+
+Using it looks a bit like this:
+
+    from dictshield.parallel import validate_parallel
+
+    for index, result in validate_parallel(User, records, processes=4):
+        if isinstance(result, list):
+            handle_errors(index, result)
+        else:
+            store(result)
+
+Document classes are sent to the workers by reference, so they must be
+importable at module level, just like anything else that's pickled.
+"""
+
+import itertools
+import multiprocessing
+
+
+# Validators generated per (document class, validate_all) in each worker
+_validators = {}
+
+
+def _validate_chunk(task):
+    """Runs in a worker process. Validates a chunk of dictionaries and
+    returns a list of `(values, exceptions)` pairs in the order given.
+    """
+    document_class, validate_all, chunk = task
+
+    key = (document_class, validate_all)
+    if key not in _validators:
+        _validators[key] = document_class._gen_validate_values(
+            validate_all=validate_all)
+    validate_values = _validators[key]
+
+    return [(values, validate_values(values)) for values in chunk]
+
+
+def _chunks(iterable, chunksize):
+    """Yields lists of up to `chunksize` items from `iterable`.
+    """
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+
+def validate_parallel(document_class, values_iterable, processes=None,
+                      chunksize=1000, validate_all=False):
+    """A generator that validates the dictionaries in `values_iterable` with
+    the semantics of `validate_class_fields`, using a pool of `processes`
+    workers. Defaults to one worker per CPU.
+
+    Work is shipped to the workers in chunks of `chunksize` dictionaries.
+    Results are yielded as `(index, result)` in input order, where `result`
+    is the cleaned dictionary if it passed and the list of `ShieldException`s
+    found otherwise. The cleaned dictionaries are copies made by the workers;
+    the input dictionaries are left alone.
+    """
+    pool = multiprocessing.Pool(processes)
+    try:
+        tasks = ((document_class, validate_all, chunk)
+                 for chunk in _chunks(values_iterable, chunksize))
+        index = 0
+        for results in pool.imap(_validate_chunk, tasks):
+            for values, exceptions in results:
+                if exceptions:
+                    yield index, exceptions
+                else:
+                    yield index, values
+                index += 1
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
@@ -0,0 +1,223 @@
+"""This module checks that URLs exist for `URLField(verify_exists=True)`.
+
+A `URLChecker` sends HEAD requests, falling back to GET for servers that
+don't allow HEAD, and follows redirects. It keeps idle connections to each
+host open for the next request and remembers each answer, positive or
+negative, for a while. `check_many` checks several URLs at once on a
+bounded pool of threads.
+
+Validating a document checks the URLs of all its fields, including those
+of lists and embedded documents, in one `check_many` call before the
+fields are validated one by one, which then find the answers cached.
+
+Fields use `default_checker` unless given one:
+
+    checker = URLChecker(timeout=2, ttl=3600, max_workers=16)
+
+    class Bookmark(Document):
+        links = ListField(URLField(verify_exists=True, checker=checker))
+"""
+
+import httplib
+import socket
+import threading
+import time
+import urlparse
+from multiprocessing.pool import ThreadPool
+
+from dictshield.datastructures import LRUCache
+
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+
+
+class URLChecker(object):
+    """Checks that URLs exist, caching the answers for `ttl` seconds, or
+    `negative_ttl` seconds for URLs that don't exist. At most `max_cached`
+    answers are kept, dropping the least recently used. Requests time out
+    after `timeout` seconds and `check_many` runs up to `max_workers` of
+    them at once.
+    """
+
+    max_redirects = 5
+
+    def __init__(self, timeout=10, ttl=300, negative_ttl=None, max_workers=8,
+                 max_cached=10000):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_workers = max_workers
+        self.max_cached = max_cached
+        # URL => (expiry time, exists)
+        self._cache = LRUCache(max_cached)
+        # (scheme, host, port) => idle connections
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'timeout': self.timeout, 'ttl': self.ttl,
+                'negative_ttl': self.negative_ttl,
+                'max_workers': self.max_workers,
+                'max_cached': self.max_cached}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __deepcopy__(self, memo):
+        # Fields copied with their document share the checker
+        return self
+
+    ###
+    ### Checking
+    ###
+
+    def exists(self, url):
+        """Returns True if `url` can be fetched without an HTTP error.
+        """
+        exists = self.cached(url)
+        if exists is None:
+            exists = self._check(url)
+            self._remember(url, exists)
+        return exists
+
+    def check_many(self, urls):
+        """Checks all of `urls` that aren't cached, concurrently, and returns
+        a dictionary mapping each URL to whether it exists.
+        """
+        results = {}
+        pending = []
+        for url in set(urls):
+            exists = self.cached(url)
+            if exists is None:
+                pending.append(url)
+            else:
+                results[url] = exists
+
+        if len(pending) > 1:
+            pool = ThreadPool(min(self.max_workers, len(pending)))
+            try:
+                answers = pool.map(self._check, pending)
+                pool.close()
+            except:
+                pool.terminate()
+                raise
+            finally:
+                pool.join()
+        else:
+            answers = [self._check(url) for url in pending]
+
+        for url, exists in zip(pending, answers):
+            self._remember(url, exists)
+            results[url] = exists
+        return results
+
+    def cached(self, url):
+        """Returns the cached answer for `url`, or None if there isn't one.
+        """
+        entry = self._cache.get(url)
+        if entry is None:
+            return None
+        if entry[0] > time.time():
+            return entry[1]
+        try:
+            del self._cache[url]
+        except KeyError:
+            # Another thread got there first
+            pass
+        return None
+
+    def clear(self):
+        """Forgets all answers and closes idle connections.
+        """
+        self._cache.clear()
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _remember(self, url, exists):
+        ttl = self.ttl if exists else self.negative_ttl
+        self._cache[url] = (time.time() + ttl, exists)
+
+    def _check(self, url):
+        method = 'HEAD'
+        for _ in xrange(self.max_redirects + 1):
+            status, location = self._request(method, url)
+            if status in _REDIRECTS and location:
+                url = urlparse.urljoin(url, location)
+            elif status in (405, 501) and method == 'HEAD':
+                method = 'GET'
+            else:
+                return status is not None and status < 400
+        return False
+
+    ###
+    ### Connections
+    ###
+
+    def _request(self, method, url):
+        """Sends a request for `url` and returns its status and Location
+        header, or `(None, None)` if it failed.
+        """
+        parts = urlparse.urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            return None, None
+        key = (parts.scheme, parts.hostname, parts.port)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+
+        connection, reused = self._connection(key)
+        try:
+            response = self._send(connection, method, path)
+        except (httplib.HTTPException, socket.error):
+            connection.close()
+            if not reused:
+                return None, None
+            # The server may have closed an idle connection, so try a new one
+            connection, reused = self._new_connection(key), False
+            try:
+                response = self._send(connection, method, path)
+            except (httplib.HTTPException, socket.error):
+                connection.close()
+                return None, None
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+        return response.status, response.getheader('location')
+
+    def _send(self, connection, method, path):
+        connection.request(method, path)
+        response = connection.getresponse()
+        response.read()
+        return response
+
+    def _connection(self, key):
+        """Returns an idle connection for `key` and True, or a new one and
+        False.
+        """
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                return idle.pop(), True
+        return self._new_connection(key), False
+
+    def _new_connection(self, key):
+        scheme, host, port = key
+        if scheme == 'https':
+            return httplib.HTTPSConnection(host, port, timeout=self.timeout)
+        return httplib.HTTPConnection(host, port, timeout=self.timeout)
+
+    def _release(self, key, connection):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_workers:
+                idle.append(connection)
+                return
+        connection.close()
+
+
+default_checker = URLChecker()
@@ -1,8 +1,29 @@
 import unittest
 import json
+import threading
+import BaseHTTPServer
+import SocketServer
 import datetime
+import decimal
 import copy
+import pickle
+import uuid
+from StringIO import StringIO
 from fixtures import demos
+from dictshield.base import (InvalidShield, JSONBackend, ShieldException,
+                             UUIDField, get_json_backend, json_backends,
+                             set_json_backend)
+from dictshield.datastructures import LRUCache
+from dictshield.document import BaseDocument, Document, EmbeddedDocument
+from dictshield.fields import (DateTimeField, EmailField,
+                               EmbeddedDocumentField, FloatField, IntField,
+                               ListField, StringField, URLField)
+from dictshield.fields.base import numpy
+from dictshield.email_address import is_email
+from dictshield.encoder import dump, fan_out, iterencode
+from dictshield.iso8601 import parse_datetime
+from dictshield.parallel import validate_parallel
+from dictshield.urlcheck import URLChecker
 
 class TestMedia(unittest.TestCase):
     
@@ -378,6 +399,1056 @@ class TestBasicUser(unittest.TestCase):
     def test_basic_user_class_to_jsonschema(self):
         self.assertEquals(self.BASIC_USER_SCHEMA, json.loads(demos.BasicUser.to_jsonschema()))
 
+class TestCompiledInit(unittest.TestCase):
+
+    def _reference(self, cls, values):
+        doc = cls.__new__(cls)
+        BaseDocument._init_data(doc, values)
+        return doc
+
+    def test_compiled_init_matches_reference(self):
+        values = {'username': 'ben', 'email': 'ben@ben.com',
+                  'first_name': 'Ben', 'last_name': 'G',
+                  'date_made': '2011-08-07T04:21:22.783762',
+                  'orders': [{'total': 7.98}], 'rogue_field': 'MWAHAHA'}
+        compiled = demos.Customer(**values)
+        reference = self._reference(demos.Customer, values)
+        compiled_data = compiled.to_python()
+        reference_data = reference.to_python()
+        for data in (compiled_data, reference_data):
+            data.pop('_id')
+            data['orders'] = [o.to_python() for o in data['orders']]
+        self.assertEquals(reference_data, compiled_data)
+        self.assertEquals('MWAHAHA', compiled.rogue_field)
+
+    def test_compiled_init_id_alias(self):
+        media = demos.Media(_id='8b9d3fa4-8e6f-4b1d-9b7f-6a9d1f0c2f11')
+        self.assertEquals('8b9d3fa4-8e6f-4b1d-9b7f-6a9d1f0c2f11', str(media.id))
+
+    def test_compiled_init_defaults(self):
+        task_list = demos.TaskList()
+        self.assertEquals([], task_list.actions)
+        self.assertEquals(0, task_list.num_completed)
+        self.assertTrue(task_list.created_date is not None)
+
+class TestCompiledValidation(unittest.TestCase):
+
+    class CompiledProduct(demos.Product):
+        meta = {'compiled_validation': True}
+
+    def _errors(self, doc):
+        try:
+            doc.validate()
+        except ShieldException, se:
+            return (se.reason, se.field_name, se.field_value)
+        return None
+
+    def test_compiled_validation_matches_interpreted(self):
+        inputs = [
+            {'sku': 1, 'title': 'Bowl', 'price': 3.99},
+            {'sku': 0, 'title': 'Bowl', 'price': 3.99},
+            {'sku': 'x', 'title': 'Bowl', 'price': 3.99},
+            {'sku': 1, 'title': 'B' * 31, 'price': 3.99},
+            {'sku': 1, 'title': 42, 'price': 3.99},
+            {'sku': 1, 'price': 3.99},
+        ]
+        for values in inputs:
+            self.assertEquals(self._errors(demos.Product(**values)),
+                              self._errors(self.CompiledProduct(**values)))
+
+    def test_compiled_validation_choices(self):
+        class Shirt(EmbeddedDocument):
+            meta = {'compiled_validation': True}
+            size = StringField(choices=['S', 'M', 'L'])
+        Shirt(size='M').validate()
+        self.assertRaises(ShieldException, Shirt(size='XL').validate)
+
+class TestValidateMany(unittest.TestCase):
+
+    def test_validate_many_error_index(self):
+        records = [
+            {'name': 'J2D2', 'secret': 'e8b5d682452313a6142c10b045a9a135',
+             'rogue_field': 'MWAHAHA'},
+            {'name': 'J2D2', 'secret': 'whatevz'},
+            {'bio': 'no name', 'secret': 'whatevz'},
+        ]
+        errors = demos.BasicUser.validate_many(records, validate_all=True)
+        self.assertEquals([1, 2], sorted(errors.keys()))
+        self.assertEquals(['secret'], [e.field_name for e in errors[1]])
+        self.assertEquals(set(['name', 'secret']),
+                          set(e.field_name for e in errors[2]))
+        self.assertFalse('rogue_field' in records[0])
+
+    def test_validate_many_matches_validate_class_fields(self):
+        values = {'name': 'J2D2', 'secret': 'whatevz', 'bio': 'x' * 101}
+        expected = demos.BasicUser.validate_class_fields(dict(values),
+                                                         validate_all=True)
+        errors = demos.BasicUser.validate_many([values], validate_all=True)
+        self.assertEquals([str(e) for e in expected],
+                          [str(e) for e in errors[0]])
+
+    def test_validate_many_wrong_types(self):
+        records = [{'name': 5}, {'name': 'J2D2'}]
+        for validate_all in (False, True):
+            errors = demos.BasicUser.validate_many(records,
+                                                   validate_all=validate_all)
+            self.assertEquals([0], errors.keys())
+            self.assertEquals(('Invalid value', 'name', 5),
+                              (errors[0][0].reason, errors[0][0].field_name,
+                               errors[0][0].field_value))
+
+    def test_validate_many_first_error_only(self):
+        values = {'name': 'J2D2', 'secret': 'whatevz', 'bio': 'x' * 101}
+        errors = demos.BasicUser.validate_many([values])
+        self.assertEquals(1, len(errors[0]))
+
+class TestIterValidate(unittest.TestCase):
+
+    NDJSON = '\n'.join([
+        '{"name": "J2D2", "bio": "J2D2 loves music", "rogue_field": 1}',
+        '',
+        '{"name": "J2D2", "secret": "whatevz"}',
+        'not json',
+        '{"name": "J2D2", "secret": "e8b5d682452313a6142c10b045a9a135"}',
+    ])
+
+    def test_iter_validate(self):
+        results = list(demos.BasicUser.iter_validate(StringIO(self.NDJSON)))
+        self.assertEquals([1, 3, 4, 5], [line_no for line_no, r in results])
+        self.assertEquals({'name': 'J2D2', 'bio': 'J2D2 loves music'},
+                          results[0][1])
+        self.assertEquals('secret', results[1][1][0].field_name)
+        self.assertEquals('Invalid JSON', results[2][1][0].reason)
+
+    def test_iter_validate_wrong_types(self):
+        lines = StringIO('{"name": "J2D2"}\n{"name": 5}\n{"name": "R2D2"}')
+        results = list(demos.BasicUser.iter_validate(lines))
+        self.assertEquals([1, 2, 3], [line_no for line_no, r in results])
+        self.assertEquals('Invalid value', results[1][1][0].reason)
+        self.assertEquals({'name': 'R2D2'}, results[2][1])
+
+    def test_iter_validate_projection(self):
+        results = demos.BasicUser.iter_validate(StringIO(self.NDJSON),
+                                                projection='public')
+        self.assertEquals({'name': 'J2D2'}, list(results)[3][1])
+
+class Category(EmbeddedDocument):
+    name = StringField()
+    parent = EmbeddedDocumentField('self')
+    tags = ListField(StringField())
+
+class TestParallelValidation(unittest.TestCase):
+
+    def test_shield_exception_pickles(self):
+        se = pickle.loads(pickle.dumps(ShieldException('Invalid', 'f', 'v')))
+        self.assertEquals(('Invalid', 'f', 'v'),
+                          (se.reason, se.field_name, se.field_value))
+
+    def test_fields_pickle_by_reference(self):
+        self.assertTrue(Category.parent.document_type is Category)
+        for field in (Category.parent, Category.tags, demos.Media.id):
+            self.assertTrue(pickle.loads(pickle.dumps(field)) is field)
+
+    def test_validate_parallel(self):
+        records = [{'name': 'J2D2', 'secret': 'whatevz'} if i % 3 == 0
+                   else {'name': 'J2D2', 'rogue_field': i}
+                   for i in range(50)]
+        results = list(validate_parallel(demos.BasicUser, records,
+                                         processes=2, chunksize=7))
+        self.assertEquals(range(50), [index for index, result in results])
+        for index, result in results:
+            if index % 3 == 0:
+                self.assertEquals('secret', result[0].field_name)
+            else:
+                self.assertEquals({'name': 'J2D2'}, result)
+
+    def test_wrong_types(self):
+        records = [{'name': 'J2D2'}, {'name': 5}, {'name': 'R2D2'}]
+        results = list(validate_parallel(demos.BasicUser, records,
+                                         processes=2, chunksize=1))
+        self.assertEquals([0, 1, 2], [index for index, result in results])
+        self.assertEquals('Invalid value', results[1][1][0].reason)
+        self.assertEquals({'name': 'R2D2'}, results[2][1])
+
+class SlotsProduct(EmbeddedDocument):
+    meta = {'slots': True}
+    sku = IntField(min_value=1, max_value=9999, required=True)
+    title = StringField(max_length=30, required=True)
+    tags = ListField(StringField())
+
+class SlotsOrder(Document):
+    meta = {'slots': True}
+    product = EmbeddedDocumentField(SlotsProduct)
+
+class TestSlots(unittest.TestCase):
+
+    def test_slots_instance(self):
+        product = SlotsProduct(sku=1, title='Japanese Bowl', tags=['bowl'])
+        self.assertFalse(hasattr(product, '__dict__'))
+        self.assertEquals(1, product['sku'])
+        self.assertEquals(['sku', 'tags', 'title'], sorted(product))
+        self.assertEquals(3, len(product))
+        self.assertEquals({'_cls': 'SlotsProduct', '_types': ['SlotsProduct'],
+                           'sku': 1, 'title': u'Japanese Bowl',
+                           'tags': [u'bowl']}, product.to_python())
+        product.validate()
+
+    def test_slots_top_level_document(self):
+        order = SlotsOrder(product={'sku': 2, 'title': 'Bowl'})
+        self.assertFalse(hasattr(order, '__dict__'))
+        self.assertEquals(36, len(str(order.id)))
+        self.assertEquals(2, order.product.sku)
+
+class TestDocumentBatch(unittest.TestCase):
+
+    def test_columns(self):
+        batch = demos.Movie.to_columns([demos.mv, {'title': 'Brazil'}])
+        self.assertEquals(2, len(batch))
+        self.assertEquals('l', batch.column('year').typecode)
+        self.assertEquals([1, 0], list(batch.present('year')))
+        self.assertEquals(['Total Recall', 'Brazil'], batch.column('title'))
+
+    def test_rows(self):
+        batch = demos.Movie.to_columns([demos.mv, {'title': 'Brazil'}])
+        self.assertEquals(1990, batch[0].year)
+        self.assertEquals('Brazil', batch[-1]['title'])
+        self.assertEquals(None, batch[1].year)
+        self.assertFalse('year' in batch[1])
+        self.assertEquals(demos.mv.to_python(), batch[0].to_python())
+        self.assertRaises(IndexError, batch.__getitem__, 2)
+
+    def test_validate(self):
+        batch = demos.Movie.to_columns([demos.mv,
+                                        {'title': 'x' * 50, 'year': 1900}])
+        errors = batch.validate(validate_all=True)
+        self.assertEquals([1], sorted(errors))
+        self.assertEquals(2, len(errors[1]))
+        self.assertEquals(1, len(batch.validate()[1]))
+
+    def test_validate_required(self):
+        batch = demos.Product.to_columns([demos.product_a, {'sku': 1}])
+        errors = batch.validate(validate_all=True)
+        self.assertEquals([1], sorted(errors))
+        self.assertEquals(['Required field missing'] * 2,
+                          [e.reason for e in errors[1]])
+
+    def test_list_fallback(self):
+        batch = demos.Movie.to_columns([demos.mv, {'title': 'Brazil',
+                                                   'year': 'abc'}])
+        self.assertEquals([1990, 'abc'], batch.column('year'))
+        self.assertEquals(None, batch.present('year'))
+        self.assertEquals('Not Int', batch.validate()[1][0].reason)
+
+class Telemetry(EmbeddedDocument):
+    readings = ListField(FloatField(min_value=-50.0, max_value=50.0))
+    counts = ListField(IntField(min_value=0))
+
+
+class TestNumericListValidation(unittest.TestCase):
+
+    def assertInvalidAt(self, index, **values):
+        try:
+            Telemetry(**values).validate()
+        except ShieldException, se:
+            self.assertEquals('Invalid ListField item at index %d' % index,
+                              se.reason)
+        else:
+            self.fail('Validation did not fail')
+
+    def test_loop(self):
+        Telemetry(readings=[1.5, -2, 3], counts=[0, 1]).validate()
+        self.assertInvalidAt(1, readings=[1.5, 60.0, -60.0])
+        self.assertInvalidAt(2, counts=[1, 2, 'x'])
+
+    @unittest.skipIf(numpy is None, 'NumPy is not installed')
+    def test_vectorised(self):
+        readings = [float(i % 100 - 50) for i in xrange(1000)]
+        Telemetry(readings=readings, counts=range(1000)).validate()
+        readings[700] = 51.0
+        readings[900] = -51.0
+        self.assertInvalidAt(700, readings=readings)
+        self.assertInvalidAt(500, counts=range(500) + [-1] * 500)
+
+    def test_vectorised_fallback(self):
+        readings = [0.0] * 100
+        readings[40] = None
+        self.assertInvalidAt(40, readings=readings)
+        self.assertInvalidAt(99, counts=range(99) + ['x'])
+        Telemetry(counts=[str(i) for i in xrange(100)]).validate()
+
+class Sensor(EmbeddedDocument):
+    name = StringField(max_length=20)
+
+
+class Station(Document):
+    sensor = EmbeddedDocumentField(Sensor)
+
+
+class TestJsonSchemaCache(unittest.TestCase):
+
+    def test_cached(self):
+        self.assertTrue(demos.Order.to_jsonschema() is
+                        demos.Order.to_jsonschema())
+        schema = demos.Order.for_jsonschema()
+        schema['properties'].clear()
+        self.assertTrue(demos.Order.for_jsonschema()['properties'])
+
+    def test_add_to_class(self):
+        self.assertFalse('unit' in json.loads(
+            Station.to_jsonschema())['properties']['sensor']['properties'])
+        Sensor.add_to_class('unit', StringField(max_length=5))
+        self.assertEquals('unit', Sensor._fields['unit'].field_name)
+        self.assertEquals({'type': 'string', 'title': 'unit', 'maxLength': 5},
+                          json.loads(Station.to_jsonschema())['properties']
+                                    ['sensor']['properties']['unit'])
+        self.assertEquals('C', Sensor(unit='C').unit)
+        self.assertRaises(ShieldException, Sensor(unit='Kelvin').validate)
+
+class TestSerializationPlans(unittest.TestCase):
+
+    def test_matches_to_fields(self):
+        for doc in [demos.mv, demos.order, demos.customer, demos.blogpost,
+                    demos.sd, demos.tl]:
+            self.assertEquals(doc._to_fields(lambda f, v: f.for_python(v)),
+                              doc.to_python())
+            self.assertEquals(doc._to_fields(lambda f, v: f.for_json(v)),
+                              doc.to_json(encode=False))
+
+    def test_defaults(self):
+        order = demos.Order()
+        order._data['line_items'] = None
+        self.assertEquals([], order.to_python()['line_items'])
+
+    def test_types_are_copied(self):
+        data = demos.mv.to_python()
+        data['_types'].append('Extra')
+        self.assertEquals(['Media', 'Media.Movie'], demos.mv.to_python()['_types'])
+
+class TestStreamingEncoder(unittest.TestCase):
+
+    def test_matches_to_json(self):
+        for doc in [demos.m, demos.mv, demos.order, demos.customer,
+                    demos.blogpost, demos.sd, demos.tl]:
+            self.assertEquals(json.loads(doc.to_json()),
+                              json.loads(''.join(iterencode(doc))))
+
+    def test_containers(self):
+        products = (product for product in [demos.product_a, demos.product_b])
+        encoded = ''.join(iterencode({'products': products, 'empty': []}))
+        self.assertEquals({'products': [demos.product_a.to_json(encode=False),
+                                        demos.product_b.to_json(encode=False)],
+                           'empty': []}, json.loads(encoded))
+
+    def test_keys(self):
+        for keys in [{1: 'a', 2.5: 'b', None: 'c', u'caf\xe9': 'd'},
+                     {True: 'a', False: 'b'}]:
+            self.assertEquals(json.loads(json.dumps(keys)),
+                              json.loads(''.join(iterencode(keys))))
+        self.assertRaises(TypeError, list, iterencode({(1, 2): 'a'}))
+
+    def test_dump(self):
+        buf = StringIO()
+        dump([demos.order] * 50, buf, buffer_size=64)
+        self.assertEquals([demos.order.to_json(encode=False)] * 50,
+                          json.loads(buf.getvalue()))
+
+class TestJSONBackends(unittest.TestCase):
+
+    def setUp(self):
+        self.default = get_json_backend()
+        self.calls = []
+        def dumps(obj):
+            self.calls.append(obj)
+            return get_json_backend('json').dumps(obj)
+        self.backend = JSONBackend('recording', dumps, json.loads)
+
+    def tearDown(self):
+        set_json_backend(self.default)
+        json_backends.pop('recording', None)
+
+    def test_default(self):
+        backend = get_json_backend()
+        self.assertTrue(backend is json_backends[backend.name])
+        sample = {'float': 0.1 + 0.2, 'text': u'caf\xe9'}
+        self.assertEquals(sample, backend.loads(backend.dumps(sample)))
+        self.assertRaises(ValueError, get_json_backend, 'missing')
+
+    def test_per_call(self):
+        encoded = demos.order.to_json(backend=self.backend)
+        self.assertEquals(demos.order.to_json(encode=False), json.loads(encoded))
+        # Datetimes are left to the backend
+        self.assertTrue(isinstance(self.calls[0]['date_made'],
+                                   datetime.datetime))
+
+    def test_set_default(self):
+        set_json_backend(self.backend)
+        self.assertEquals('recording', get_json_backend().name)
+        demos.Movie.make_json_ownersafe(demos.mv.to_python())
+        self.assertEquals(1, len(self.calls))
+
+    def test_handlers(self):
+        when = datetime.datetime(2012, 1, 2, 3, 4, 5)
+        encoded = get_json_backend().dumps({'id': demos.mv.id, 'when': when,
+                                            'price': decimal.Decimal('3.50')})
+        self.assertEquals({'id': str(demos.mv.id),
+                           'when': '2012-01-02T03:04:05',
+                           'price': '3.50'}, json.loads(encoded))
+        self.assertEquals(json.loads(demos.customer.to_json()),
+                          demos.customer.to_json(encode=False))
+
+class TestProjectedSerialization(unittest.TestCase):
+
+    def test_matches_make_json_safe(self):
+        for doc in [demos.mv, demos.order, demos.customer, demos.blogpost,
+                    demos.u]:
+            self.assertEquals(json.loads(doc.make_json_ownersafe(doc)),
+                              json.loads(doc.to_json(projection='owner')))
+            self.assertEquals(json.loads(doc.make_json_publicsafe(doc)),
+                              json.loads(doc.to_json(projection='public')))
+
+    def test_skips_fields(self):
+        self.assertEquals(sorted(demos.Movie._public_fields),
+                          sorted(demos.mv.to_json(encode=False,
+                                                  projection='public')))
+
+    def test_unknown_projection(self):
+        self.assertRaises(ValueError, demos.mv.to_json, projection='admin')
+
+class TestPermissionSets(unittest.TestCase):
+
+    def test_sets(self):
+        Author = demos.Author
+        self.assertEquals(frozenset(['_id', 'id', '_cls', '_types']),
+                          Author._internal_field_set)
+        self.assertEquals(frozenset(['is_active']), Author._private_field_set)
+        self.assertEquals(frozenset(['username', 'name']),
+                          Author._public_field_set)
+        self.assertEquals(Author._internal_field_set | frozenset(['is_active']),
+                          Author._get_internal_fields())
+        self.assertTrue(isinstance(Author._get_internal_fields(), frozenset))
+
+    def test_defaults(self):
+        self.assertEquals(frozenset(), demos.Movie._private_field_set)
+        self.assertEquals(None, demos.Order._public_field_set)
+        self.assertEquals(demos.Order._internal_field_set,
+                          demos.Order._hidden_field_set)
+
+    def test_reassigned(self):
+        class Note(Document):
+            _public_fields = ['title', 'body']
+            title = StringField()
+            body = StringField()
+        class Memo(Note):
+            pass
+        note = Note(title='a', body='b')
+        for cls in (Note, Memo):
+            self.assertEquals(['body', 'title'],
+                              sorted(cls.for_jsonschema()['properties']))
+        Note._public_fields = ['title']
+        Note._private_fields = ['body']
+        for cls in (Note, Memo):
+            self.assertEquals(frozenset(['title']), cls._public_field_set)
+            self.assertEquals({'title': 'a'},
+                              cls.make_publicsafe({'title': 'a', 'body': 'b'}))
+            self.assertEquals(['title'],
+                              sorted(cls.for_jsonschema()['properties']))
+        self.assertEquals({'title': u'a'},
+                          note.to_json(encode=False, projection='public'))
+        self.assertFalse('body' in note.to_json(encode=False,
+                                                projection='owner'))
+
+class Address(EmbeddedDocument):
+    _private_fields = ['notes']
+    _projections = {'partner': ['city']}
+    street = StringField()
+    city = StringField()
+    notes = StringField()
+
+
+class Account(Document):
+    _projections = {
+        'admin': ['_id', 'name', 'email', 'addresses'],
+        'partner': ['name', 'addresses'],
+    }
+    name = StringField()
+    email = StringField()
+    addresses = ListField(EmbeddedDocumentField(Address))
+
+
+class TestNamedProjections(unittest.TestCase):
+
+    def setUp(self):
+        self.account = Account(name='Ann', email='ann@example.com',
+                               addresses=[{'street': '1 Main St',
+                                           'city': 'Springfield',
+                                           'notes': 'Ring twice'}])
+
+    def test_to_json(self):
+        self.assertEquals({'name': 'Ann', 'addresses': [{'city': 'Springfield'}]},
+                          json.loads(self.account.to_json(projection='partner')))
+        # Address has no admin projection and falls back to owner
+        admin = self.account.to_json(encode=False, projection='admin')
+        self.assertEquals(str(self.account.id), admin['_id'])
+        self.assertEquals([{'street': '1 Main St', 'city': 'Springfield'}],
+                          admin['addresses'])
+
+    def test_project_many(self):
+        projections = ['admin', 'partner', 'owner', 'public']
+        views = self.account.project_many(projections)
+        self.assertEquals(sorted(projections), sorted(views))
+        for projection in projections:
+            self.assertEquals(self.account.to_json(encode=False,
+                                                   projection=projection),
+                              views[projection])
+        # Leaf values are converted once
+        self.assertTrue(views['admin']['name'] is views['partner']['name'])
+        self.assertRaises(ValueError, self.account.project_many, ['staff'])
+
+class TestFanOut(unittest.TestCase):
+
+    def test_document(self):
+        views = fan_out(demos.blogpost, ['owner', 'public'])
+        self.assertEquals(json.loads(demos.blogpost.make_json_ownersafe(
+                              demos.blogpost)), json.loads(views['owner']))
+        self.assertEquals(json.loads(demos.blogpost.make_json_publicsafe(
+                              demos.blogpost)), json.loads(views['public']))
+
+    def test_list(self):
+        movies = [demos.mv, demos.Movie(title='Brazil', year=1985)]
+        views = fan_out(movies, ['owner', 'public'], encode=False)
+        self.assertEquals([{'title': u'Brazil', 'year': 1985}],
+                          views['public'][1:])
+        self.assertEquals(demos.Movie.make_ownersafe(movies),
+                          views['owner'])
+
+class TestSafeCopies(unittest.TestCase):
+
+    def test_ownersafe(self):
+        data = demos.blogpost.to_python()
+        before = dict(data)
+        safe = demos.BlogPost.make_ownersafe(data, inplace=False)
+        self.assertEquals(before, data)
+        self.assertEquals(demos.BlogPost.make_ownersafe(dict(data)), safe)
+        self.assertFalse('personal_thoughts' in safe)
+
+    def test_publicsafe(self):
+        data = [demos.mv.to_python(), demos.mv.to_python()]
+        safe = demos.Movie.make_publicsafe(data, inplace=False)
+        self.assertEquals(demos.mv.to_python(), data[0])
+        self.assertEquals([{'title': u'Total Recall', 'year': 1990}] * 2, safe)
+
+    def test_json_does_not_mutate(self):
+        data = demos.mv.to_python()
+        demos.Movie.make_json_publicsafe(data)
+        self.assertEquals(demos.mv.to_python(), data)
+
+class TestLazyHydration(unittest.TestCase):
+
+    def setUp(self):
+        self.raw = {'_id': '0c1a4d3e-5f6a-4b7c-8d9e-0f1a2b3c4d5e',
+                    'name': 'Jo', 'email': 'jo@example.com',
+                    'addresses': [{'street': 'Main', 'city': 'Ghent'}]}
+
+    def test_lazy_reads(self):
+        account = Account.wrap(self.raw)
+        # Only the id is set right away
+        self.assertEquals({Account.id.field_name: uuid.UUID(self.raw['_id'])},
+                          account._data)
+        self.assertEquals('Jo', account.name)
+        self.assertEquals('Jo', account._data['name'])
+        self.assertFalse('email' in account._data)
+        self.assertEquals('0c1a4d3e-5f6a-4b7c-8d9e-0f1a2b3c4d5e',
+                          str(account.id))
+        self.assertEquals('Ghent', account.addresses[0].city)
+        self.assertTrue(account._raw is self.raw)
+
+    def test_matches_constructor(self):
+        account = Account.wrap(self.raw)
+        data = account.to_python()
+        self.assertEquals(None, account._raw)
+        expected = Account(**self.raw).to_python()
+        self.assertEquals(expected.pop('addresses')[0].to_python(),
+                          data.pop('addresses')[0].to_python())
+        self.assertEquals(expected, data)
+        self.assertEquals(json.loads(Account(**self.raw).to_json()),
+                          json.loads(Account.wrap(self.raw).to_json()))
+        self.assertEquals(''.join(iterencode(Account(**self.raw))),
+                          ''.join(iterencode(Account.wrap(self.raw))))
+
+    def test_assignment_wins(self):
+        account = Account.wrap(self.raw)
+        account.name = 'Ann'
+        self.assertEquals('Ann', account.to_python()['name'])
+
+    def test_defaults_and_validation(self):
+        account = Account.wrap({'name': 'Jo', 'colour': 'red'})
+        self.assertEquals(36, len(str(account.id)))
+        self.assertEquals('red', account.colour)
+        account.validate()
+        product = demos.Product.wrap({'sku': 12345})
+        self.assertRaises(ShieldException, product.validate)
+
+    def test_slots(self):
+        order = SlotsOrder.wrap({'product': {'sku': 2, 'title': 'Bowl'}})
+        self.assertEquals(2, order.product.sku)
+        self.assertEquals(2, len(order))
+        order.validate()
+        self.assertEquals(None, SlotsOrder()._raw)
+
+checked_names = []
+
+def check_name(value):
+    checked_names.append(value)
+    return True
+
+class Profile(EmbeddedDocument):
+    age = IntField(min_value=0)
+
+class Session(Document):
+    name = StringField(required=True, validation=check_name)
+    visits = IntField(min_value=0)
+    tags = ListField(StringField(max_length=5))
+    profile = EmbeddedDocumentField(Profile)
+
+class UpperField(StringField):
+    # Sets values the way fields written before `_store` did
+    def __set__(self, instance, value):
+        instance._data[self.field_name] = value and value.upper()
+
+class Badge(Document):
+    code = UpperField(max_length=3)
+
+class TestIncrementalValidation(unittest.TestCase):
+
+    def setUp(self):
+        del checked_names[:]
+        self.session = Session(name='jo', visits=1, tags=['a'],
+                               profile={'age': 3})
+        self.session.validate()
+
+    def test_skips_clean_fields(self):
+        self.session.validate()
+        self.session.visits = 2
+        self.session.validate()
+        self.assertEquals(['jo'], checked_names)
+        self.session.name = 'ann'
+        self.session.validate()
+        self.assertEquals(['jo', 'ann'], checked_names)
+        self.session.validate(full=True)
+        self.assertEquals(['jo', 'ann', 'ann'], checked_names)
+
+    def test_dirty_until_valid(self):
+        self.session.visits = -1
+        self.assertRaises(ShieldException, self.session.validate)
+        self.assertRaises(ShieldException, self.session.validate)
+        self.session.visits = 1
+        self.session.validate()
+        self.assertEquals(set(), self.session._dirty_fields)
+
+    def test_mutable_values(self):
+        self.session.tags.append('toolong')
+        self.assertRaises(ShieldException, self.session.validate)
+        self.session.tags.pop()
+        self.session.profile.age = -1
+        self.assertRaises(ShieldException, self.session.validate)
+        self.session.profile.age = 4
+        self.session.validate()
+
+    def test_full_reaches_embedded(self):
+        self.session.profile._data['age'] = -1
+        self.session.validate()
+        self.assertRaises(ShieldException, self.session.validate, full=True)
+
+    def test_required(self):
+        self.session.name = None
+        self.assertRaises(ShieldException, self.session.validate)
+
+    def test_id(self):
+        self.session.id = 5
+        self.assertRaises(ShieldException, self.session.validate)
+
+    def test_without_store(self):
+        badge = Badge(code='ab')
+        badge.validate()
+        badge.code = 'abcd'
+        self.assertRaises(ShieldException, badge.validate)
+
+    def test_slots(self):
+        product = SlotsProduct(sku=1, title='Bowl')
+        product.validate()
+        product.sku = 0
+        self.assertRaises(ShieldException, product.validate)
+
+class TestDeltas(unittest.TestCase):
+
+    def setUp(self):
+        self.session = Session(name='jo', visits=1, tags=['a'],
+                               profile={'age': 3})
+
+    def test_never_clean(self):
+        self.assertEquals(self.session.to_python(),
+                          self.session.to_python_delta())
+
+    def test_fields(self):
+        self.session.mark_clean()
+        self.assertEquals({}, self.session.to_python_delta())
+        self.session.visits = 2
+        self.session.name = None
+        self.assertEquals({'visits': 2, 'name': None},
+                          self.session.to_python_delta())
+        self.session.mark_clean()
+        self.assertEquals({}, self.session.to_json_delta(encode=False))
+
+    def test_paths(self):
+        self.session.mark_clean()
+        self.session.tags.append('b')
+        self.session.tags.append('c')
+        self.session.profile.age = 4
+        self.assertEquals({'tags.1': u'b', 'tags.2': u'c', 'profile.age': 4},
+                          json.loads(self.session.to_json_delta()))
+
+    def test_replaced_items(self):
+        self.session.mark_clean()
+        self.session.tags[0] = 'z'
+        self.assertEquals({'tags': [u'z']}, self.session.to_python_delta())
+        self.session.mark_clean()
+        self.session.tags.pop()
+        self.assertEquals({'tags': []}, self.session.to_python_delta())
+
+    def test_list_of_documents(self):
+        account = Account(name='Jo', addresses=[{'city': 'Ghent'}])
+        account.mark_clean()
+        account.addresses[0].city = 'Bruges'
+        account.addresses.append(Address(city='Paris'))
+        self.assertEquals({'addresses.0.city': u'Bruges',
+                           'addresses.1': {'_cls': 'Address',
+                                           '_types': ['Address'],
+                                           'city': u'Paris'}},
+                          account.to_json_delta(encode=False))
+
+    def test_id(self):
+        self.session.mark_clean()
+        self.session.id = uuid.UUID(int=1)
+        self.assertEquals({'_id': uuid.UUID(int=1)},
+                          self.session.to_python_delta())
+
+    def test_replaced_document(self):
+        self.session.mark_clean()
+        self.session.profile = Profile(age=5)
+        self.assertEquals({'profile': {'_cls': 'Profile',
+                                       '_types': ['Profile'], 'age': 5}},
+                          self.session.to_json_delta(encode=False))
+
+class Event(Document):
+    happened = DateTimeField()
+
+class TestISO8601(unittest.TestCase):
+
+    def test_formats(self):
+        self.assertEquals(datetime.datetime(2012, 3, 4, 5, 6, 7, 123456),
+                          parse_datetime('2012-03-04T05:06:07.123456'))
+        self.assertEquals(datetime.datetime(2012, 3, 4, 5, 6, 7),
+                          parse_datetime(u'2012-03-04T05:06:07'))
+        self.assertEquals(datetime.datetime(2012, 3, 4, 5, 6, 7, 250000),
+                          parse_datetime('2012-03-04 05:06:07,25'))
+        self.assertEquals(datetime.datetime(2012, 3, 4, 5, 6),
+                          parse_datetime('2012-03-04T05:06'))
+        self.assertEquals(datetime.datetime(2012, 3, 4),
+                          parse_datetime('2012-03-04'))
+
+    def test_offsets(self):
+        utc = parse_datetime('2012-03-04T05:06:07.123456789Z')
+        self.assertEquals(datetime.timedelta(0), utc.utcoffset())
+        self.assertEquals(123456, utc.microsecond)
+        later = parse_datetime('2012-03-04T07:36:07.123456-0230')
+        self.assertEquals(datetime.timedelta(minutes=-150), later.utcoffset())
+        self.assertEquals(utc + datetime.timedelta(hours=5), later)
+        self.assertEquals('2012-03-04T05:06:07+02:00',
+                          parse_datetime('2012-03-04T05:06:07+02').isoformat())
+        self.assertEquals(utc, pickle.loads(pickle.dumps(utc)))
+
+    def test_invalid(self):
+        for datestring in ['2012-03-04T05:06:07 ', '2012-3-04T05:06:07',
+                           '2012-13-04T05:06:07', '2012-03-04T05:06:+7',
+                           '2012-03-04T05:06:07+24:00', '']:
+            self.assertRaises(ValueError, parse_datetime, datestring)
+
+    def test_field(self):
+        event = Event(happened='2012-03-04T05:06:07+01:00')
+        self.assertEquals('2012-03-04T05:06:07+01:00',
+                          event.to_json(encode=False)['happened'])
+
+class TestEmailAddresses(unittest.TestCase):
+
+    corpus = [
+        'jane@example.com', 'Jane.Doe+news@mail.Example.CO.uk',
+        "!#$%&'*+/=?^_`{}|~-@example.museum", 'jane@example.com.',
+        'jane@example.com\n', '"jane doe"@example.com',
+        '"j@ne\\"x"@example.com', '"\\\n"@example.com',
+        'a@%s.com' % ('x' * 63), 'a@1-2.example.com',
+        '', '@example.com', 'jane', 'jane@', 'jane@com', 'jane@example.c',
+        'jane@example.museums', 'jane@example.c0m', '.jane@example.com',
+        'jane.@example.com', 'ja..ne@example.com', 'jane@-example.com',
+        'jane@example-.com', 'jane@exa_mple.com', 'jane@example..com',
+        'jane@example.com..', 'jane@example.com\n\n', 'jane@example.com ',
+        'ja ne@example.com', 'a@%s.com' % ('x' * 64), '"jane"x@example.com',
+        '"jane@example.com', '"ja"ne"@example.com', '"\\"@example.com',
+        '"\t"@example.com', 'jane@example.com@example.com',
+        u'j\xe9@example.com', u'jane@\u212aelvin.com', 'jane\n@example.com',
+    ]
+
+    def test_matches_regex(self):
+        for address in self.corpus:
+            self.assertEquals(bool(EmailField.EMAIL_REGEX.match(address)),
+                              is_email(address), address)
+
+    def test_field(self):
+        self.assertRaises(ShieldException, EmailField().validate,
+                          'a.' * 3000 + '@')
+        self.assertRaises(ShieldException, EmailField().validate, 5)
+        EmailField().validate('jane@example.com')
+
+class LinkHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def respond(self, body):
+        self.server.requests.append((self.command, self.path))
+        path = self.path.split('?')[0]
+        if path == '/moved':
+            self.send_response(302)
+            self.send_header('Location', '/ok')
+        elif path == '/nohead' and self.command == 'HEAD':
+            self.send_response(405)
+        elif path in ('/ok', '/nohead'):
+            self.send_response(200)
+        else:
+            self.send_response(404)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command == 'GET':
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self.respond('')
+
+    def do_GET(self):
+        self.respond('found')
+
+    def log_message(self, *args):
+        pass
+
+class LinkServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+class TestURLChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.server = LinkServer(('127.0.0.1', 0), LinkHandler)
+        self.server.requests = []
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       args=(0.01,))
+        self.thread.daemon = True
+        self.thread.start()
+        self.base = 'http://127.0.0.1:%d' % self.server.server_address[1]
+        self.checker = URLChecker(timeout=5, ttl=60, max_workers=4)
+
+    def tearDown(self):
+        self.checker.clear()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_exists(self):
+        self.assertTrue(self.checker.exists(self.base + '/ok'))
+        self.assertFalse(self.checker.exists(self.base + '/missing'))
+        self.assertTrue(self.checker.exists(self.base + '/moved'))
+        self.assertTrue(self.checker.exists(self.base + '/nohead'))
+        self.assertFalse(self.checker.exists('http://127.0.0.1:1/'))
+        self.assertEquals([('HEAD', '/ok'), ('HEAD', '/missing'),
+                           ('HEAD', '/moved'), ('HEAD', '/ok'),
+                           ('HEAD', '/nohead'), ('GET', '/nohead')],
+                          self.server.requests)
+        self.assertEquals(1, self.server.connections)
+
+    def test_cache(self):
+        self.checker.exists(self.base + '/ok')
+        self.checker.exists(self.base + '/missing')
+        self.assertTrue(self.checker.exists(self.base + '/ok'))
+        self.assertFalse(self.checker.exists(self.base + '/missing'))
+        self.assertEquals(2, len(self.server.requests))
+        checker = URLChecker(ttl=60, negative_ttl=0)
+        checker.exists(self.base + '/ok')
+        checker.exists(self.base + '/missing')
+        self.assertEquals(None, checker.cached(self.base + '/missing'))
+        self.assertTrue(checker.cached(self.base + '/ok'))
+        # Expired answers are dropped
+        self.assertEquals(1, len(checker._cache))
+        checker.clear()
+
+    def test_cache_size(self):
+        checker = URLChecker(ttl=60, max_cached=2)
+        for i in range(3):
+            checker.exists(self.base + '/ok?page=%d' % i)
+        self.assertEquals(2, len(checker._cache))
+        self.assertEquals(None, checker.cached(self.base + '/ok?page=0'))
+        checker.clear()
+
+    def test_check_many(self):
+        urls = [self.base + '/ok?page=%d' % i for i in range(20)]
+        urls.append(self.base + '/missing')
+        results = self.checker.check_many(urls + urls)
+        self.assertEquals(21, len(results))
+        self.assertEquals(20, sum(results.values()))
+        self.assertEquals(21, len(self.server.requests))
+        self.assertTrue(self.server.connections <= 4)
+
+    def test_document(self):
+        checker = self.checker
+
+        class Link(EmbeddedDocument):
+            url = URLField(verify_exists=True, checker=checker)
+
+        class Page(Document):
+            links = ListField(URLField(verify_exists=True, checker=checker))
+            related = ListField(EmbeddedDocumentField(Link))
+
+        page = Page(links=[self.base + '/ok', self.base + '/moved'],
+                    related=[{'url': self.base + '/ok?related'}])
+        page.validate()
+        self.assertEquals(4, len(self.server.requests))
+        page.related.append(Link(url=self.base + '/missing'))
+        self.assertRaises(ShieldException, page.validate)
+        self.assertEquals(5, len(self.server.requests))
+
+lookups = []
+
+def in_reference_table(value):
+    lookups.append(value)
+    return value != 'retired'
+
+class Signup(EmbeddedDocument):
+    meta = {'compiled_validation': True}
+    email = EmailField(cache_validation=2)
+    plan = StringField(validation=in_reference_table, cache_validation=10)
+    aliases = ListField(EmailField(cache_validation=10))
+
+class TestValidationCache(unittest.TestCase):
+
+    def setUp(self):
+        del lookups[:]
+
+    def test_lru(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertEquals(1, cache.get('a'))
+        cache['c'] = 3
+        self.assertEquals(None, cache.get('b'))
+        self.assertEquals(['a', 'c'], sorted(key for key in 'abc'
+                                             if key in cache))
+        self.assertEquals((1, 1), (cache.hits, cache.misses))
+        self.assertEquals(0, len(copy.deepcopy(cache)))
+        del cache['a']
+        self.assertEquals(['c'], [key for key in 'abc' if key in cache])
+        cache['d'] = 4
+        cache['e'] = 5
+        self.assertEquals(['d', 'e'], [key for key in 'cde' if key in cache])
+
+    def test_hits(self):
+        cache = Signup.plan.validation_cache
+        cache.clear()
+        hits, misses = cache.hits, cache.misses
+        for i in range(3):
+            Signup(email='jo@example.com', plan='basic').validate(full=True)
+        self.assertEquals(['basic'], lookups)
+        self.assertEquals((hits + 2, misses + 1), (cache.hits, cache.misses))
+
+    def test_errors(self):
+        Signup.plan.validation_cache.clear()
+        signup = Signup(email='not an address', plan='retired')
+        for i in range(2):
+            self.assertRaises(ShieldException, signup.validate, full=True)
+            signup.email = 'jo@example.com'
+            self.assertRaises(ShieldException, signup.validate, full=True)
+            signup.email = 'not an address'
+        self.assertEquals(['retired'], lookups)
+
+    def test_list_items(self):
+        field = Signup.aliases.field
+        hits = field.validation_cache.hits
+        signup = Signup(aliases=['jo@example.com', 'jo@example.com', 'jo'])
+        self.assertRaises(ShieldException, signup.validate)
+        self.assertEquals(hits + 1, field.validation_cache.hits)
+
+    def test_not_cached(self):
+        field = EmailField(cache_validation=10)
+        self.assertRaises(ShieldException, field._validate, ['unhashable'])
+        self.assertEquals(0, len(field.validation_cache))
+        self.assertRaises(InvalidShield, ListField, StringField(),
+                          cache_validation=10)
+
+class TestUUIDs(unittest.TestCase):
+
+    value = uuid.UUID('12345678-1234-5678-1234-567812345678')
+
+    def setUp(self):
+        self.made = []
+        def uuid4():
+            self.made.append(uuid.UUID(int=len(self.made) + 1))
+            return self.made[-1]
+        self.uuid4, uuid.uuid4 = uuid.uuid4, uuid4
+
+    def tearDown(self):
+        uuid.uuid4 = self.uuid4
+
+    def test_loading(self):
+        for doc in [Account(_id=str(self.value), name='Jo'),
+                    Account.wrap({'_id': self.value.hex, 'name': 'Jo'})]:
+            doc.validate()
+            self.assertEquals(self.value, doc.to_python()['_id'])
+            self.assertEquals(self.value, doc.id)
+        self.assertEquals([], self.made)
+
+    def test_new_documents(self):
+        account = Account(name='Jo')
+        self.assertEquals([account.id], self.made)
+        Account(name='Jo', id='')
+        Account.wrap({'name': 'Jo'})
+        self.assertEquals(3, len(self.made))
+
+    def test_copies(self):
+        for account in [Account(name='Jo'), Account.wrap({'name': 'Jo'})]:
+            for copied in [pickle.loads(pickle.dumps(account)),
+                           copy.deepcopy(account)]:
+                self.assertEquals(account.id, copied.id)
+                self.assertEquals(account, copied)
+
+    def test_parse(self):
+        field = UUIDField(field_name='id')
+        account = Account()
+        for value in [str(self.value), unicode(self.value), self.value.hex,
+                      '{%s}' % self.value, self.value.urn, self.value]:
+            field.__set__(account, value)
+            self.assertEquals(self.value, account._data['id'])
+            field.validate(value)
+        for value in ['a1', 'g' * 32, self.value.hex + '0', 'a' * 16,
+                      self.value.bytes]:
+            self.assertRaises(ValueError, field.__set__, account, value)
+            self.assertRaises(ShieldException, field.validate, value)
+
+    def test_binary(self):
+        field = UUIDField(field_name='id', binary=True)
+        account = Account()
+        field.__set__(account, self.value.bytes)
+        self.assertEquals(self.value, account._data['id'])
+        field.validate(self.value.bytes)
+        self.assertRaises(ShieldException, field.validate, u'a' * 16)
+
 if __name__ == '__main__':
     unittest.main()
 